@@ -9,6 +9,8 @@ from datetime import datetime
 from src.config import Config
 from src.rag_engine import RAGEngine
 from src.data_ingestion import DataIngestion
+from src.sharding import load_shard_manifest
+from src.snapshot import find_latest_snapshot, import_snapshot
 
 
 # Configuration de la page
@@ -54,26 +56,6 @@ st.markdown("""
     .source-card em {
         color: #666666;
     }
-    .chat-message {
-        padding: 1rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-        color: #000000;
-    }
-    .user-message {
-        background-color: #e3f2fd;
-        border-left: 4px solid #2196f3;
-    }
-    .user-message strong {
-        color: #1565c0;
-    }
-    .bot-message {
-        background-color: #f5f5f5;
-        border-left: 4px solid #4caf50;
-    }
-    .bot-message strong {
-        color: #2e7d32;
-    }
 </style>
 """, unsafe_allow_html=True)
 
@@ -88,10 +70,16 @@ def initialize_session_state():
         st.session_state.current_profile = None
     if 'vectorstore_loaded' not in st.session_state:
         st.session_state.vectorstore_loaded = False
+    if 'history_limit' not in st.session_state:
+        st.session_state.history_limit = Config.HISTORY_PAGE_SIZE
+    if 'snapshot_import_error' not in st.session_state:
+        st.session_state.snapshot_import_error = None
 
 
 def check_vectorstore_exists():
     """Vérifie si la base vectorielle existe"""
+    if Config.SHARD_STRATEGY != "none":
+        return load_shard_manifest() is not None
     return os.path.exists(Config.CHROMA_DB_DIR) and \
            os.path.exists(os.path.join(Config.CHROMA_DB_DIR, 'chroma.sqlite3'))
 
@@ -124,6 +112,8 @@ def sidebar_setup():
                     try:
                         ingestion = DataIngestion()
                         ingestion.ingest_all_documents()
+                        # Le moteur est recréé pour recharger les index (quantifié, lexical, shards)
+                        st.session_state.rag_engine = None
                         st.success("✅ Réindexation terminée!")
                         st.rerun()
                     except Exception as e:
@@ -145,6 +135,7 @@ def sidebar_setup():
         if profile != st.session_state.current_profile:
             st.session_state.current_profile = profile
             st.session_state.chat_history = []
+            st.session_state.history_limit = Config.HISTORY_PAGE_SIZE
         
         st.markdown(f'<div class="profile-badge">Connecté: {profile}</div>', 
                     unsafe_allow_html=True)
@@ -153,7 +144,7 @@ def sidebar_setup():
         
         if st.button("🗑️ Effacer l'historique", use_container_width=True):
             st.session_state.chat_history = []
-            st.rerun()
+            st.session_state.history_limit = Config.HISTORY_PAGE_SIZE
         
         st.divider()
         
@@ -162,49 +153,133 @@ def sidebar_setup():
         st.caption("IntraBot v1.0")
         st.caption("Agent RAG sécurisé avec Mistral AI")
         st.caption(f"Modèle: {Config.LLM_MODEL}")
+        
+        # Statistiques de routage (passage extrait, petit modèle, modèle complet)
+        if st.session_state.rag_engine is not None:
+            with st.expander("📊 Routage des requêtes"):
+                for tier, stats in st.session_state.rag_engine.get_routing_stats().items():
+                    st.caption(
+                        f"{tier}: {stats['count']} requêtes · "
+                        f"{stats['avg_latency']:.2f} s en moyenne · "
+                        f"{stats['input_tokens'] + stats['output_tokens']} tokens"
+                    )
 
 
-def display_chat_history():
-    """Affiche l'historique des conversations"""
-    for message in st.session_state.chat_history:
-        timestamp = message.get('timestamp', '')
-        
-        if message['role'] == 'user':
-            with st.container():
-                st.markdown(f"""
-                <div class="chat-message user-message">
-                    <strong>👤 Vous ({message['profile']})</strong> <small>{timestamp}</small><br/>
-                    <div style="color: #000000; margin-top: 0.5rem;">{message['content']}</div>
-                </div>
-                """, unsafe_allow_html=True)
+def render_sources(sources, key):
+    """
+    Affiche les cartes de sources d'une réponse, uniquement à la demande
+
+    Args:
+        sources: Liste des sources retournées par le moteur RAG
+        key: Clé unique du widget pour ce message
+    """
+    if not sources:
+        return
+
+    # Les cartes ne sont construites que si l'utilisateur les demande
+    if not st.toggle(f"📄 Sources utilisées ({len(sources)})", key=key):
+        return
+
+    for source in sources:
+        # Vérifier que c'est bien une liste
+        profils = source.get('profils', [])
+        if isinstance(profils, list):
+            profils_str = ', '.join(profils)
         else:
-            with st.container():
-                st.markdown(f"""
-                <div class="chat-message bot-message">
-                    <strong>🤖 IntraBot</strong> <small>{timestamp}</small><br/>
-                    <div style="color: #000000; margin-top: 0.5rem;">{message['content']}</div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Afficher les sources si disponibles
-                if message.get('sources'):
-                    with st.expander(f"📄 Sources utilisées ({len(message['sources'])})"):
-                        for source in message['sources']:
-                            # Vérifier que c'est bien une liste
-                            profils = source.get('profils', [])
-                            if isinstance(profils, list):
-                                profils_str = ', '.join(profils)
-                            else:
-                                profils_str = str(profils)
-                            
-                            st.markdown(f"""
-                            <div class="source-card">
-                                <strong>📄 {source.get('title', 'Sans titre')}</strong><br/>
-                                <small>📁 Fichier: {source.get('filename', 'N/A')}</small><br/>
-                                <small>👥 Profils autorisés: {profils_str}</small><br/>
-                                <em>📝 {source.get('description', '')}</em>
-                            </div>
-                            """, unsafe_allow_html=True)
+            profils_str = str(profils)
+
+        st.markdown(f"""
+        <div class="source-card">
+            <strong>📄 {source.get('title', 'Sans titre')}</strong><br/>
+            <small>📁 Fichier: {source.get('filename', 'N/A')}</small><br/>
+            <small>👥 Profils autorisés: {profils_str}</small><br/>
+            <em>📝 {source.get('description', '')}</em>
+        </div>
+        """, unsafe_allow_html=True)
+
+
+def render_message(message, index):
+    """
+    Affiche un message de la conversation avec les éléments de chat natifs
+
+    Args:
+        message: Message de l'historique
+        index: Position du message dans l'historique
+    """
+    timestamp = message.get('timestamp', '')
+
+    if message['role'] == 'user':
+        with st.chat_message("user", avatar="👤"):
+            st.caption(f"Vous ({message['profile']}) · {timestamp}")
+            st.markdown(message['content'])
+    else:
+        with st.chat_message("assistant", avatar="🤖"):
+            st.caption(f"IntraBot · {timestamp}")
+            st.markdown(message['content'])
+            render_sources(message.get('sources'), key=f"sources_{index}")
+
+
+@st.fragment
+def display_chat_history():
+    """
+    Affiche l'historique des conversations
+
+    Seuls les derniers messages sont rendus ; les plus anciens sont chargés
+    page par page à la demande, sans relancer le script complet.
+    """
+    history = st.session_state.chat_history
+    start = max(0, len(history) - st.session_state.history_limit)
+
+    if start > 0:
+        if st.button(f"⬆️ Afficher les messages précédents ({start} masqués)",
+                     key="load_older_messages"):
+            st.session_state.history_limit += Config.HISTORY_PAGE_SIZE
+            st.rerun(scope="fragment")
+
+    for index in range(start, len(history)):
+        render_message(history[index], index)
+
+
+def answer_question(user_question):
+    """
+    Traite une nouvelle question et affiche uniquement ce nouvel échange
+
+    Args:
+        user_question: Question saisie par l'utilisateur
+    """
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    history = st.session_state.chat_history
+
+    # Ajouter la question à l'historique
+    history.append({
+        'role': 'user',
+        'content': user_question,
+        'profile': st.session_state.current_profile,
+        'timestamp': timestamp
+    })
+    render_message(history[-1], len(history) - 1)
+
+    # Générer la réponse
+    with st.spinner("🤔 IntraBot réfléchit..."):
+        try:
+            result = st.session_state.rag_engine.generate_answer(
+                query=user_question,
+                user_profile=st.session_state.current_profile,
+                return_sources=True
+            )
+        except Exception as e:
+            st.error(f"❌ Erreur lors de la génération de la réponse: {str(e)}")
+            return
+
+    # Ajouter la réponse à l'historique et l'afficher sans recharger la page
+    history.append({
+        'role': 'assistant',
+        'content': result['answer'],
+        'sources': result.get('sources', []),
+        'timestamp': timestamp
+    })
+    render_message(history[-1], len(history) - 1)
+
 
 def main():
     """Fonction principale de l'application"""
@@ -214,6 +289,19 @@ def main():
     st.markdown('<h1 class="main-header">🤖 IntraBot - Assistant Intranet Intelligent</h1>', 
                 unsafe_allow_html=True)
     
+    # Démarrage à froid : importer le snapshot de l'index plutôt que tout ré-embedder
+    # (une seule tentative par session : un échec n'est pas retenté à chaque interaction)
+    if st.session_state.snapshot_import_error is None \
+            and not check_vectorstore_exists() and find_latest_snapshot():
+        with st.spinner("Import du snapshot de l'index..."):
+            try:
+                import_snapshot()
+            except Exception as e:
+                st.session_state.snapshot_import_error = str(e)
+    
+    if st.session_state.snapshot_import_error:
+        st.error(f"❌ Erreur lors de l'import du snapshot: {st.session_state.snapshot_import_error}")
+    
     # Barre latérale
     sidebar_setup()
     
@@ -244,54 +332,14 @@ def main():
     display_chat_history()
     
     # Zone de saisie
-    with st.form(key="question_form", clear_on_submit=True):
-        col1, col2 = st.columns([5, 1])
-        
-        with col1:
-            user_question = st.text_input(
-                "Posez votre question:",
-                placeholder="Ex: Comment fonctionne l'architecture microservices ?",
-                label_visibility="collapsed"
-            )
-        
-        with col2:
-            submit_button = st.form_submit_button("Envoyer 📤", use_container_width=True)
-    
-    # Traiter la question
-    if submit_button and user_question:
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # Ajouter la question à l'historique
-        st.session_state.chat_history.append({
-            'role': 'user',
-            'content': user_question,
-            'profile': st.session_state.current_profile,
-            'timestamp': timestamp
-        })
-        
-        # Générer la réponse
-        with st.spinner("🤔 IntraBot réfléchit..."):
-            try:
-                result = st.session_state.rag_engine.generate_answer(
-                    query=user_question,
-                    user_profile=st.session_state.current_profile,
-                    return_sources=True
-                )
-                
-                # Ajouter la réponse à l'historique
-                st.session_state.chat_history.append({
-                    'role': 'assistant',
-                    'content': result['answer'],
-                    'sources': result.get('sources', []),
-                    'timestamp': timestamp
-                })
-                
-            except Exception as e:
-                st.error(f"❌ Erreur lors de la génération de la réponse: {str(e)}")
-        
-        # Recharger pour afficher la nouvelle conversation
-        st.rerun()
-    
+    user_question = st.chat_input(
+        "Posez votre question... Ex: Comment fonctionne l'architecture microservices ?"
+    )
+
+    # Traiter la question : seul le nouvel échange est rendu
+    if user_question:
+        answer_question(user_question)
+
     # Section d'exemples
     with st.expander("💡 Questions d'exemple par profil"):
         col1, col2, col3 = st.columns(3)
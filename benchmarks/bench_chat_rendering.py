@@ -0,0 +1,107 @@
+"""
+Mesure du temps de rerun de l'interface Streamlit selon la longueur de la conversation
+
+Utilise le harnais de test Streamlit (AppTest) avec un moteur RAG factice :
+aucun appel à l'API Mistral n'est effectué.
+
+Usage (depuis la racine du projet):
+    python -m benchmarks.bench_chat_rendering
+"""
+import time
+from statistics import median
+
+from streamlit.testing.v1 import AppTest
+
+TURN_COUNTS = [10, 100, 500]
+REPEATS = 5
+
+FAKE_SOURCES = [
+    {
+        'title': 'Politique de Congés Payés',
+        'filename': 'rh_1.txt',
+        'description': 'Règles et procédures concernant les congés',
+        'profils': ['RH', 'Manager']
+    }
+]
+
+
+class FakeRAGEngine:
+    """Moteur RAG factice renvoyant une réponse constante"""
+
+    def generate_answer(self, query, user_profile, return_sources=True):
+        return {
+            'answer': f"Réponse de test à : {query}",
+            'sources': FAKE_SOURCES if return_sources else [],
+            'profile': user_profile,
+            'num_sources': len(FAKE_SOURCES)
+        }
+
+    def get_routing_stats(self):
+        return {}
+
+
+def build_history(turns: int):
+    """Construit un historique de `turns` échanges question/réponse"""
+    history = []
+    for i in range(turns):
+        history.append({
+            'role': 'user',
+            'content': f"Question numéro {i} sur la politique de congés ?",
+            'profile': 'RH',
+            'timestamp': '12:00:00'
+        })
+        history.append({
+            'role': 'assistant',
+            'content': f"Réponse numéro {i}. " * 20,
+            'sources': FAKE_SOURCES,
+            'timestamp': '12:00:00'
+        })
+    return history
+
+
+def create_app(turns: int) -> AppTest:
+    """Prépare une instance de l'application avec un historique pré-rempli"""
+    at = AppTest.from_file("app.py", default_timeout=120)
+    at.session_state["rag_engine"] = FakeRAGEngine()
+    at.session_state["current_profile"] = "RH"
+    at.session_state["chat_history"] = build_history(turns)
+    at.run()
+    return at
+
+
+def measure(turns: int) -> dict:
+    """Mesure la médiane des temps de rerun simple et de soumission"""
+    at = create_app(turns)
+
+    rerun_times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        at.run()
+        rerun_times.append(time.perf_counter() - start)
+
+    submit_times = []
+    for i in range(REPEATS):
+        # Réinitialiser l'historique pour garder la même longueur à chaque mesure
+        at.session_state["chat_history"] = build_history(turns)
+        start = time.perf_counter()
+        at.chat_input[0].set_value(f"Question de mesure {i}").run()
+        submit_times.append(time.perf_counter() - start)
+
+    return {
+        'turns': turns,
+        'rerun_ms': median(rerun_times) * 1000,
+        'submit_ms': median(submit_times) * 1000
+    }
+
+
+def main():
+    """Affiche les temps de rerun pour chaque taille de conversation"""
+    print(f"{'Échanges':>10} | {'Rerun (ms)':>12} | {'Soumission (ms)':>16}")
+    print("-" * 44)
+    for turns in TURN_COUNTS:
+        result = measure(turns)
+        print(f"{result['turns']:>10} | {result['rerun_ms']:>12.1f} | {result['submit_ms']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Rapport rappel / mémoire des index quantifiés sur le corpus indexé
+
+Chaque chunk du corpus sert de requête (le chunk lui-même est exclu des
+résultats) ; la référence est la recherche exacte en float32. Les vecteurs
+identiques (chunk ingéré plusieurs fois) ne sont comptés qu'une fois, et un
+résultat ex aequo avec le K-ième voisin exact compte comme trouvé. Aucun appel
+à l'API Mistral n'est effectué : les embeddings sont lus dans ChromaDB.
+
+Usage (depuis la racine du projet):
+    python -m benchmarks.bench_quantization
+"""
+import tempfile
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.data_ingestion import DataIngestion
+from src.quantization import QuantizedIndex, _normalize
+
+K = 5
+RESCORE_FACTORS = [1, 2, 4, 8]
+
+
+def recall_at_k(index: QuantizedIndex, vectors: np.ndarray, factor: int) -> float:
+    """Rappel@K moyen de l'index par rapport à la recherche exacte"""
+    exact_scores = vectors @ vectors.T
+    np.fill_diagonal(exact_scores, -np.inf)
+    positions = {id(doc): row for row, doc in enumerate(index.documents)}
+
+    recalls = []
+    for row, query in enumerate(vectors):
+        threshold = np.sort(exact_scores[row])[-K] - 1e-6
+        results = index.search(query, k=K + 1, num_candidates=factor * (K + 1))
+        found = [positions[id(doc)] for doc, _ in results if positions[id(doc)] != row][:K]
+        recalls.append(sum(exact_scores[row, col] >= threshold for col in found) / K)
+
+    return float(np.mean(recalls))
+
+
+def main():
+    """Affiche le rappel et la mémoire pour chaque mode de stockage"""
+    data = DataIngestion.load_existing_vectorstore().get(
+        include=["embeddings", "documents", "metadatas"]
+    )
+    vectors = _normalize(np.asarray(data['embeddings'], dtype=np.float32))
+    _, rows = np.unique(vectors, axis=0, return_index=True)
+    rows.sort()
+    print(f"Corpus: {vectors.shape[0]} vecteurs dont {len(rows)} distincts, "
+          f"de dimension {vectors.shape[1]}\n")
+    vectors = vectors[rows]
+    documents = [Document(page_content=data['documents'][row]) for row in rows]
+
+    print(f"{'Mode':>8} | {'Mémoire (Ko)':>12} | {'Ratio':>6} | " +
+          " | ".join(f"R@{K} x{f}" for f in RESCORE_FACTORS))
+    print("-" * 72)
+
+    for mode in ["int8", "binary"]:
+        with tempfile.TemporaryDirectory() as index_dir:
+            index = QuantizedIndex.build(vectors, documents, mode=mode, index_dir=index_dir)
+            memory = index.memory_bytes()
+            recalls = [recall_at_k(index, vectors, f) for f in RESCORE_FACTORS]
+            print(f"{mode:>8} | {memory['quantized'] / 1024:>12.1f} | "
+                  f"{memory['quantized'] / memory['float32']:>6.2f} | " +
+                  " | ".join(f"{r:>7.3f}" for r in recalls))
+
+    print(f"\nRéférence float32: {vectors.nbytes / 1024:.1f} Ko")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Découpage des documents selon leur structure (titres, articles, pages)
+"""
+import os
+import re
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.config import Config
+
+
+# Titres Markdown : "# Titre", "## Sous-titre"
+_MARKDOWN_HEADING = re.compile(r"^(#{1,6})\s+(.+)$")
+# Articles et divisions juridiques : "Article 3", "CHAPITRE II", "Titre 1er",
+# "Engagement n° 3 : ...", "N° 2 - ..." (reconnus même sans ligne vide avant)
+_ARTICLE_HEADING = re.compile(
+    r"^(?:(?:article|chapitre|titre|section|annexe|engagement)\s+(?:n[°o]\.?\s*)?"
+    r"(?:[0-9]+|[ivxlc]+|premier|1er)|n°\s*[0-9]+)\b.*$",
+    re.IGNORECASE
+)
+# Titres numérotés : "1. Délai de Prévenance", "2.3 Validation"
+_NUMBERED_HEADING = re.compile(r"^(\d+(?:\.\d+)*)[.)]?\s+(\S.*)$")
+
+MAX_HEADING_LENGTH = 80
+
+
+def detect_heading(line: str, previous_blank: bool) -> Optional[Tuple[int, str]]:
+    """
+    Détecte si une ligne est un titre de section
+
+    Args:
+        line: Ligne de texte (sans retour à la ligne)
+        previous_blank: La ligne précédente est vide (ou début de page)
+
+    Returns:
+        (niveau, titre) si la ligne est un titre, sinon None
+    """
+    text = line.strip()
+    if not text or len(text) > MAX_HEADING_LENGTH:
+        return None
+
+    match = _MARKDOWN_HEADING.match(text)
+    if match:
+        return len(match.group(1)), match.group(2).strip("=# ").strip() or text
+
+    if _ARTICLE_HEADING.match(text):
+        return 1, text
+
+    # Les phrases et éléments de liste ne sont pas des titres
+    if text[-1] in ".;,:!?" or text.startswith(("-", "•", "*")):
+        return None
+
+    match = _NUMBERED_HEADING.match(text)
+    if match:
+        return match.group(1).count(".") + 2, text
+
+    # Ligne courte isolée commençant par une majuscule : titre simple
+    if previous_blank and text[0].isupper():
+        return 1, text
+
+    return None
+
+
+class StructureAwareSplitter:
+    """
+    Découpe les documents en sections de taille variable
+
+    Chaque section (du titre au titre suivant) forme un chunk si elle tient
+    dans Config.CHUNK_SIZE ; sinon elle est redécoupée par caractères. Les
+    sections ne traversent jamais une frontière de page. Chaque chunk reçoit
+    les métadonnées 'section', 'parent_section', 'section_id', 'parent_id',
+    'chunk_index' et, pour les PDF, 'page_number' (à partir de 1).
+    """
+
+    def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
+        self.chunk_size = chunk_size or Config.CHUNK_SIZE
+        self.fallback_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_size,
+            chunk_overlap=chunk_overlap if chunk_overlap is not None else Config.CHUNK_OVERLAP,
+            separators=["\n\n", "\n", ". ", " ", ""]
+        )
+
+    def _sections(self, documents: List[Document]):
+        """
+        Parcourt les pages et regroupe les lignes par section
+
+        Yields:
+            (page, titre, titre_parent, index_section, index_parent, texte)
+        """
+        section, parent = None, None
+        section_index, parent_index = -1, -1
+
+        for page in documents:
+            lines = []
+            previous_blank = True
+
+            for line in page.page_content.splitlines() + [None]:
+                # None marque la fin de page : la section continue sur la page suivante
+                heading = detect_heading(line, previous_blank) if line is not None else None
+
+                if heading or line is None:
+                    text = "\n".join(lines).strip()
+                    # Une section réduite à son titre ne produit pas de chunk
+                    if text and text != section:
+                        yield page, section, parent, section_index, parent_index, text
+                    lines = []
+
+                if line is None:
+                    break
+
+                if heading:
+                    level, section = heading
+                    section_index += 1
+                    if level <= 1 or parent is None:
+                        parent, parent_index = section, section_index
+
+                lines.append(line)
+                previous_blank = not line.strip()
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        Découpe des documents (une entrée par page pour les PDF)
+
+        Args:
+            documents: Documents chargés par les loaders LangChain
+
+        Returns:
+            Chunks avec métadonnées de structure
+        """
+        chunks = []
+
+        for page, section, parent, section_index, parent_index, text in self._sections(documents):
+            source = os.path.basename(page.metadata.get('source', ''))
+            metadata = dict(page.metadata)
+            metadata.update({
+                'section': section or '',
+                'parent_section': parent or section or '',
+                'section_id': f"{source}#{section_index}",
+                'parent_id': f"{source}#{parent_index}",
+            })
+            if 'page' in page.metadata:
+                metadata['page_number'] = int(page.metadata['page']) + 1
+
+            if len(text) <= self.chunk_size:
+                pieces = [text]
+            else:
+                pieces = self.fallback_splitter.split_text(text)
+
+            for piece in pieces:
+                chunks.append(Document(page_content=piece, metadata=dict(metadata)))
+
+        for index, chunk in enumerate(chunks):
+            chunk.metadata['chunk_index'] = index
+
+        return chunks
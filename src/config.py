@@ -17,12 +17,22 @@ class Config:
     # ==================== MODÈLES ====================
     LLM_MODEL = "open-mistral-7b"  # Pour la génération de réponses
     EMBEDDING_MODEL = "mistral-embed"    # Pour les embeddings
+    SMALL_LLM_MODEL = "ministral-3b-latest"  # Pour les questions simples (routage)
     
     # ==================== PARAMÈTRES RAG ====================
     CHUNK_SIZE = 2000                    # Taille des chunks de texte
     CHUNK_OVERLAP = 200                  # Chevauchement entre chunks
+    CHUNKING_STRATEGY = "structure"      # "structure" (titres, articles, pages) ou "recursive"
+    PARENT_EXPANSION_MIN_HITS = 2        # Sections d'un même parent avant d'élargir au parent
+    PARENT_EXPANSION_MAX_CHARS = 6000    # Taille max d'une section parente élargie
     TOP_K_RESULTS = 6                    # Nombre de documents à récupérer
     
+    # ==================== DÉDUPLICATION ====================
+    DEDUP_ENABLED = True                 # Fusionner les chunks quasi-identiques à l'ingestion
+    DEDUP_THRESHOLD = 0.85               # Similarité de Jaccard estimée minimale
+    MINHASH_PERMUTATIONS = 64            # Taille des signatures MinHash
+    MINHASH_BANDS = 16                   # Bandes LSH (MINHASH_PERMUTATIONS / MINHASH_BANDS lignes)
+    
     # ==================== PARAMÈTRES LLM ====================
     TEMPERATURE = 0.3                    # Contrôle la créativité (0 = déterministe)
     MAX_TOKENS = 1000                    # Longueur max de la réponse
@@ -30,7 +40,43 @@ class Config:
     # ==================== CHEMINS ====================
     DATA_DIR = "data/raw"
     METADATA_FILE = "data/metadata.json"
+    REGISTRY_DB = "data/registry.sqlite3"
     CHROMA_DB_DIR = "data/chroma_db"
+    SHARDS_DIR = "data/chroma_db/shards"
+    QUANTIZED_INDEX_DIR = "data/quantized_index"
+    SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/snapshots")
+    
+    # ==================== ROUTAGE DES REQUÊTES ====================
+    ROUTING_ENABLED = True               # Passage extrait / petit modèle pour les questions simples
+    ROUTER_EXTRACTIVE_MIN_SCORE = 0.80   # Similarité minimale du meilleur passage (réponse extraite)
+    ROUTER_EXTRACTIVE_MIN_OVERLAP = 2    # Mots de la question à retrouver dans la phrase extraite
+    ROUTER_EXTRACTIVE_MIN_MARGIN = 0.05  # Écart minimal avec le 2e passage (réponse extraite)
+    ROUTER_SMALL_MIN_SCORE = 0.75        # Similarité minimale pour le petit modèle
+    ROUTER_SMALL_MAX_WORDS = 12          # Longueur max d'une question « simple »
+    ROUTER_SMALL_TOP_K = 3               # Passages envoyés au petit modèle
+    
+    # ==================== BUDGETS DE LATENCE (secondes) ====================
+    REQUEST_BUDGET = 20.0                # Budget total d'une requête
+    EMBEDDING_BUDGET = 2.0               # Vectorisation de la question (sinon recherche lexicale)
+    RETRIEVAL_BUDGET = 3.0               # Recherche vectorielle (sinon recherche lexicale)
+    GENERATION_BUDGET = 15.0             # Génération LLM (sinon réponse extractive)
+    EMBEDDING_CACHE_SIZE = 256           # Embeddings de questions gardés en cache
+    API_MAX_RETRIES = 1                  # Tentatives par appel API pendant une requête (1 = sans nouvel essai)
+    EXTRACTIVE_MAX_PASSAGES = 3          # Passages renvoyés en mode extractif
+    
+    # ==================== STOCKAGE DES VECTEURS ====================
+    VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "float32")  # "float32", "int8" ou "binary"
+    RESCORE_FACTOR = 4                   # Candidats re-scorés en float32 = RESCORE_FACTOR * k
+    
+    # ==================== SHARDING ====================
+    SHARD_STRATEGY = os.getenv("SHARD_STRATEGY", "none")   # "none", "group" (par profils) ou "hash" (par ID de chunk)
+    NUM_SHARDS = int(os.getenv("NUM_SHARDS", "4"))          # Nombre de shards pour la stratégie "hash"
+    SHARD_TIMEOUT = float(os.getenv("SHARD_TIMEOUT", "2.0"))  # Délai max (s) accordé à chaque shard
+    SHARD_HOSTS = os.getenv("SHARD_HOSTS", "")              # "shard=hôte:port,..." pour les shards distants
+    LEXICAL_SHARD_CANDIDATES = 50        # Chunks candidats par shard pour la recherche lexicale de secours
+    
+    # ==================== INTERFACE ====================
+    HISTORY_PAGE_SIZE = 20               # Messages affichés par page d'historique
     
     # ==================== PROFILS UTILISATEURS ====================
     AVAILABLE_PROFILES = ["Technique", "RH", "Manager", "General"]
@@ -1,7 +1,7 @@
 """
 Pipeline d'ingestion des documents dans la base vectorielle
 """
-import json
+import math
 import os
 from typing import List, Dict
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -11,6 +11,12 @@ from langchain_mistralai import MistralAIEmbeddings
 from langchain_core.documents import Document 
 
 from src.config import Config
+from src.sharding import partition_chunks, open_shard, write_shard_manifest
+from src.quantization import build_from_vectorstore
+from src.deduplication import collapse_near_duplicates
+from src.chunking import StructureAwareSplitter
+from src.registry import DocumentRegistry
+from src.utils import file_sha256
 
 
 class DataIngestion:
@@ -27,26 +33,17 @@ class DataIngestion:
         )
         
         # Initialiser le text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=Config.CHUNK_SIZE,
-            chunk_overlap=Config.CHUNK_OVERLAP,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
-        
-        # Charger les métadonnées
-        self.metadata_map = self._load_metadata()
-    
-    def _load_metadata(self) -> Dict:
-        """Charge les métadonnées depuis le fichier JSON"""
-        with open(Config.METADATA_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if Config.CHUNKING_STRATEGY == "structure":
+            self.text_splitter = StructureAwareSplitter()
+        else:
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=Config.CHUNK_SIZE,
+                chunk_overlap=Config.CHUNK_OVERLAP,
+                separators=["\n\n", "\n", ". ", " ", ""]
+            )
         
-        # Créer un mapping filename -> metadata
-        metadata_dict = {}
-        for doc_meta in data['documents']:
-            metadata_dict[doc_meta['filename']] = doc_meta
-        
-        return metadata_dict
+        # Registre des documents (initialisé depuis metadata.json s'il est vide)
+        self.registry = DocumentRegistry.open_default()
     
     def load_document(self, filepath: str) -> List[Document]:
         """
@@ -99,22 +96,21 @@ class DataIngestion:
         # Découper en chunks
         chunks = self.text_splitter.split_documents(docs)
         
-        # Récupérer les métadonnées du fichier
-        file_metadata = self.metadata_map.get(filename, {})
+        # Récupérer les métadonnées du fichier dans le registre
+        file_metadata = self.registry.get(filename) or {}
+        self.registry.set_content_hash(filename, file_sha256(filepath))
         
-        # Ajouter les métadonnées à chaque chunk
+        # Ajouter les métadonnées à chaque chunk. Seul 'doc_id' est utilisé à la
+        # requête : titre et profils sont relus dans le registre, ils ne sont
+        # copiés ici que pour le regroupement des shards et la déduplication.
         for chunk in chunks:
-            profils = file_metadata.get('profils_autorises', [])
-            if isinstance(profils, list):
-                profils = ", ".join(map(str, profils))  # Transformer la liste en chaîne de caractères
-
             chunk.metadata.update({
+                'doc_id': filename,
                 'filename': filename,
                 'title': file_metadata.get('title', filename),
-                'profils_autorises': profils,
+                'profils_autorises': file_metadata.get('profils_autorises', ''),
                 'description': file_metadata.get('description', '')
             })
-
         
         return chunks
     
@@ -129,8 +125,9 @@ class DataIngestion:
         
         all_chunks = []
         
-        # Traiter chaque document référencé dans les métadonnées
-        for filename in self.metadata_map.keys():
+        # Traiter chaque document référencé dans le registre
+        filenames = [doc['filename'] for doc in self.registry.list_documents()]
+        for filename in filenames:
             print(f"Traitement de {filename}...")
             chunks = self.process_document(filename)
             all_chunks.extend(chunks)
@@ -144,7 +141,7 @@ class DataIngestion:
             
             # Identifier les fichiers mentionnés dans les métadonnées mais absents sur le disque
             missing_files = []
-            for filename in self.metadata_map.keys():
+            for filename in filenames:
                 filepath = os.path.join(Config.DATA_DIR, filename)
                 if not os.path.exists(filepath):
                     missing_files.append(filename)
@@ -155,7 +152,7 @@ class DataIngestion:
                 
                 for filename in missing_files:
                     filepath = os.path.join(Config.DATA_DIR, filename)
-                    meta = self.metadata_map.get(filename, {})
+                    meta = self.registry.get(filename) or {}
                     # CORRECTION: Utiliser une variable intermédiaire pour les retours à la ligne
                     title = meta.get('title', filename)
                     description = meta.get('description', "Document de test généré automatiquement pour l'ingestion.")
@@ -186,6 +183,13 @@ class DataIngestion:
                 print("   - Lancer une exécution de test avec un petit fichier txt dans le dossier.")
                 return None
         
+        # Fusionner les paragraphes répétés entre fichiers (mentions légales, en-têtes...)
+        if Config.DEDUP_ENABLED:
+            all_chunks = collapse_near_duplicates(all_chunks)
+        
+        if Config.SHARD_STRATEGY != "none":
+            return self.ingest_into_shards(all_chunks)
+        
         # Créer la base vectorielle ChromaDB
         print("Création des embeddings et indexation dans ChromaDB...")
         vectorstore = Chroma.from_documents(
@@ -194,9 +198,40 @@ class DataIngestion:
             persist_directory=Config.CHROMA_DB_DIR,
             collection_name="intrabot_docs"
         )
+        
+        if Config.VECTOR_STORAGE != "float32":
+            print(f"Construction de l'index quantifié ({Config.VECTOR_STORAGE})...")
+            build_from_vectorstore(vectorstore)
 
         print("Ingestion terminée avec succès!")
         return vectorstore
+    
+    def ingest_into_shards(self, chunks: List[Document]) -> Dict[str, Chroma]:
+        """
+        Répartit les chunks dans plusieurs shards selon Config.SHARD_STRATEGY
+        
+        Args:
+            chunks: Chunks à indexer
+            
+        Returns:
+            Mapping nom du shard -> instance Chroma
+        """
+        shards = partition_chunks(chunks)
+        print(f"Indexation dans {len(shards)} shards (stratégie: {Config.SHARD_STRATEGY})...")
+        
+        vectorstores = {}
+        for name, shard in shards.items():
+            vectorstore = open_shard(name, self.embeddings)
+            # Repartir d'une collection vide pour que la réindexation soit idempotente
+            vectorstore.delete_collection()
+            vectorstore = open_shard(name, self.embeddings)
+            vectorstore.add_documents(shard['documents'], ids=shard['ids'])
+            vectorstores[name] = vectorstore
+            print(f"   ✓ {name}: {len(shard['documents'])} chunks")
+        
+        write_shard_manifest(shards)
+        print("Ingestion terminée avec succès!")
+        return vectorstores
 
     
     @staticmethod
@@ -204,12 +239,18 @@ class DataIngestion:
         """
         Charge une base vectorielle existante
         
+        Les embeddings servent à vectoriser les questions : chaque appel est
+        borné par Config.EMBEDDING_BUDGET, sans nouvel essai, pour qu'un
+        appel abandonné ne garde pas un thread du moteur pendant des minutes.
+        
         Returns:
             Instance de la base vectorielle Chroma
         """
         embeddings = MistralAIEmbeddings(
             model=Config.EMBEDDING_MODEL,
-            mistral_api_key=Config.MISTRAL_API_KEY
+            mistral_api_key=Config.MISTRAL_API_KEY,
+            timeout=math.ceil(Config.EMBEDDING_BUDGET),
+            max_retries=Config.API_MAX_RETRIES
         )
         
         return Chroma(
@@ -223,6 +264,9 @@ def main():
     """Fonction principale pour tester l'ingestion"""
     ingestion = DataIngestion()
     vectorstore = ingestion.ingest_all_documents()
+    if isinstance(vectorstore, dict):
+        # Base partitionnée : la recherche se fait via RAGEngine
+        return
     
     # Test de recherche
     print("\nTest de recherche...")
@@ -0,0 +1,186 @@
+"""
+Détection des chunks quasi-dupliqués (MinHash + LSH) et gestion de leur provenance
+"""
+import hashlib
+import json
+import random
+import re
+from typing import List, Dict, Optional
+
+from langchain_core.documents import Document
+
+from src.config import Config
+from src.utils import split_profiles
+
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+SHINGLE_SIZE = 5
+# Position d'un chunk dans son document : propre à chaque source d'un chunk fusionné
+LOCATION_KEYS = ('section', 'parent_section', 'section_id', 'parent_id', 'page_number', 'chunk_index')
+
+
+def _shingles(text: str) -> set:
+    """Ensemble des n-grammes de mots (texte normalisé)"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {
+        " ".join(words[i:i + SHINGLE_SIZE])
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+class MinHasher:
+    """Signatures MinHash déterministes (indépendantes du processus)"""
+
+    def __init__(self, num_perm: int = None, seed: int = 42):
+        self.num_perm = num_perm or Config.MINHASH_PERMUTATIONS
+        rng = random.Random(seed)
+        self._params = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(self.num_perm)
+        ]
+
+    def signature(self, text: str) -> List[int]:
+        """Calcule la signature MinHash d'un texte"""
+        hashes = [
+            int.from_bytes(hashlib.md5(s.encode("utf-8")).digest()[:4], "little")
+            for s in _shingles(text)
+        ]
+        if not hashes:
+            return [_MAX_HASH] * self.num_perm
+
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._params
+        ]
+
+    @staticmethod
+    def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+        """Estimation de la similarité de Jaccard entre deux signatures"""
+        return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def source_doc_ids(doc: Document) -> List[str]:
+    """Identifiants des documents sources d'un chunk"""
+    provenance = doc.metadata.get('provenance')
+    if provenance:
+        return [source['filename'] for source in json.loads(provenance)]
+    return [_source_entry(doc)['filename']]
+
+
+def _source_entry(chunk: Document) -> Dict:
+    """Informations d'affichage d'un document source, et position du chunk dans ce document"""
+    entry = {
+        'filename': chunk.metadata.get('doc_id') or chunk.metadata.get('filename', ''),
+        'title': chunk.metadata.get('title', 'Document sans titre'),
+        'description': chunk.metadata.get('description', ''),
+        'profils_autorises': chunk.metadata.get('profils_autorises', '')
+    }
+    entry.update({key: chunk.metadata[key] for key in LOCATION_KEYS if key in chunk.metadata})
+    return entry
+
+
+def collapse_near_duplicates(chunks: List[Document]) -> List[Document]:
+    """
+    Regroupe les chunks quasi-identiques en un chunk canonique
+
+    Le chunk canonique (première occurrence) reçoit l'union des profils
+    autorisés et la liste de tous les documents sources (métadonnée
+    'provenance', sérialisée en JSON car Chroma n'accepte que des scalaires).
+
+    Args:
+        chunks: Chunks de tous les fichiers
+
+    Returns:
+        Chunks dédupliqués
+    """
+    hasher = MinHasher()
+    rows = hasher.num_perm // Config.MINHASH_BANDS
+
+    canonical = []
+    signatures = []
+    sources = []
+    buckets = {}
+
+    for chunk in chunks:
+        signature = hasher.signature(chunk.page_content)
+        bands = [
+            (band, tuple(signature[band * rows:(band + 1) * rows]))
+            for band in range(Config.MINHASH_BANDS)
+        ]
+
+        # Candidats : chunks canoniques partageant au moins une bande
+        candidates = {idx for key in bands for idx in buckets.get(key, [])}
+        match = None
+        for idx in sorted(candidates):
+            if MinHasher.similarity(signature, signatures[idx]) >= Config.DEDUP_THRESHOLD:
+                match = idx
+                break
+
+        if match is not None:
+            entry = _source_entry(chunk)
+            if entry['filename'] not in {s['filename'] for s in sources[match]}:
+                sources[match].append(entry)
+            continue
+
+        idx = len(canonical)
+        canonical.append(chunk)
+        signatures.append(signature)
+        sources.append([_source_entry(chunk)])
+        for key in bands:
+            buckets.setdefault(key, []).append(idx)
+
+    for chunk, chunk_sources in zip(canonical, sources):
+        if len(chunk_sources) < 2:
+            continue
+
+        profils = []
+        for source in chunk_sources:
+            for profil in split_profiles(source['profils_autorises']):
+                if profil not in profils:
+                    profils.append(profil)
+
+        chunk.metadata['profils_autorises'] = ", ".join(profils)
+        chunk.metadata['provenance'] = json.dumps(chunk_sources, ensure_ascii=False)
+
+    print(f"Déduplication: {len(chunks)} chunks -> {len(canonical)} chunks canoniques")
+    return canonical
+
+
+def expand_provenance(
+    doc: Document,
+    user_profile: Optional[str] = None,
+    records: Optional[Dict[str, Dict]] = None
+) -> List[Dict]:
+    """
+    Liste les documents sources d'un chunk (éventuellement dédupliqué)
+
+    Args:
+        doc: Chunk récupéré
+        user_profile: Si fourni, ne garde que les sources accessibles à ce profil
+        records: Fiches du registre des documents (doc_id -> fiche) ; si
+            fourni, titres et profils y sont relus et les documents absents
+            du registre sont écartés
+
+    Returns:
+        Liste de sources {'filename', 'title', 'description', 'profils_autorises'},
+        avec la position du passage dans chaque source (LOCATION_KEYS) si elle est connue
+    """
+    provenance = doc.metadata.get('provenance')
+    sources = json.loads(provenance) if provenance else [_source_entry(doc)]
+
+    if records is not None:
+        sources = [
+            {**source, **records[source['filename']]}
+            for source in sources if source['filename'] in records
+        ]
+
+    if user_profile is None:
+        return sources
+
+    return [
+        source for source in sources
+        if user_profile in split_profiles(source['profils_autorises'])
+    ]
@@ -0,0 +1,78 @@
+"""
+Recherche lexicale (TF-IDF) utilisée en secours quand les embeddings sont indisponibles
+"""
+import math
+import re
+from collections import Counter
+from typing import List, Tuple
+
+from langchain_core.documents import Document
+
+
+MIN_TERM_LENGTH = 3
+
+# Mots grammaticaux et interrogatifs, sans valeur pour la recherche d'un passage
+STOPWORDS = frozenset("""
+    les des une est sont pour par sur dans avec sans sous entre vers chez
+    aux que qui quoi quel quelle quels quelles dont combien quand comment pourquoi
+    cette ces ses leur leurs nos vos notre votre mon ton son mes tes
+    elle elles ils nous vous lui eux moi toi
+    pas plus moins très tout tous toute toutes autre autres même
+    être avoir fait faire peut peux doit dois faut ont été était sera
+    mais donc car puis alors aussi ainsi comme
+    the and for are
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Découpe un texte en termes normalisés (minuscules, mots de 3 lettres ou plus)"""
+    return [t for t in re.findall(r"\w+", text.lower()) if len(t) >= MIN_TERM_LENGTH]
+
+
+class LexicalIndex:
+    """Index TF-IDF en mémoire sur les chunks indexés"""
+
+    def __init__(self, documents: List[Document]):
+        """
+        Construit l'index
+
+        Args:
+            documents: Chunks à indexer (avec leurs métadonnées)
+        """
+        self.documents = documents
+        self.term_counts = [Counter(tokenize(doc.page_content)) for doc in documents]
+
+        document_frequency = Counter()
+        for counts in self.term_counts:
+            document_frequency.update(counts.keys())
+
+        total = len(documents)
+        self.idf = {
+            term: math.log(1 + total / freq)
+            for term, freq in document_frequency.items()
+        }
+
+    def search(self, query: str, k: int) -> List[Tuple[Document, float]]:
+        """
+        Recherche les chunks partageant le plus de termes rares avec la requête
+
+        Args:
+            query: Question de l'utilisateur
+            k: Nombre de résultats
+
+        Returns:
+            Couples (document, score) triés par score décroissant
+        """
+        terms = set(tokenize(query))
+        scored = []
+
+        for doc, counts in zip(self.documents, self.term_counts):
+            score = sum(
+                (1 + math.log(counts[term])) * self.idf[term]
+                for term in terms if counts.get(term)
+            )
+            if score > 0:
+                scored.append((doc, score))
+
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:k]
@@ -0,0 +1,302 @@
+"""
+Index d'embeddings quantifiés (int8 ou binaire) avec re-scoring en pleine précision
+"""
+import json
+import os
+from typing import List, Dict, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.config import Config
+
+
+CODES_FILE = "codes.npy"
+SCALES_FILE = "scales.npy"
+FULL_FILE = "full_precision.npy"
+DOCUMENTS_FILE = "documents.json"
+MANIFEST_FILE = "manifest.json"
+# Lignes scorées à la fois en 1re passe : borne la copie temporaire des codes
+SCORE_BLOCK_SIZE = 4096
+# Nombre de bits à 1 de chaque octet (distance de Hamming en mode binaire)
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Normalise les vecteurs (norme L2 = 1) pour une similarité cosinus"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize(vectors: np.ndarray, mode: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantifie des vecteurs float32
+
+    Args:
+        vectors: Matrice (n, d) de vecteurs normalisés
+        mode: "int8" (échelle symétrique par vecteur) ou "binary" (signe, 1 bit)
+
+    Returns:
+        Codes quantifiés et échelles par vecteur (vide en mode binaire)
+    """
+    if mode == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.round(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    if mode == "binary":
+        return np.packbits(vectors > 0, axis=1), np.empty(0, dtype=np.float32)
+
+    raise ValueError(f"Mode de quantification inconnu: {mode}")
+
+
+class QuantizedIndex:
+    """Recherche en deux passes : codes quantifiés en mémoire, re-scoring sur disque"""
+
+    def __init__(
+        self,
+        mode: str,
+        codes: np.ndarray,
+        scales: np.ndarray,
+        full_vectors: np.ndarray,
+        documents: List[Document]
+    ):
+        """
+        Initialise l'index
+
+        Args:
+            mode: "int8" ou "binary"
+            codes: Vecteurs quantifiés, gardés en mémoire
+            scales: Échelles par vecteur (mode int8)
+            full_vectors: Vecteurs float32, idéalement mappés depuis le disque
+            documents: Chunks correspondant à chaque ligne
+        """
+        self.mode = mode
+        self.codes = codes
+        self.scales = scales
+        self.full_vectors = full_vectors
+        self.documents = documents
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        documents: List[Document],
+        mode: str = None,
+        index_dir: str = None
+    ) -> "QuantizedIndex":
+        """
+        Construit l'index et l'écrit sur disque
+
+        Args:
+            embeddings: Matrice (n, d) des embeddings des chunks
+            documents: Chunks correspondants
+            mode: Mode de quantification (Config.VECTOR_STORAGE par défaut)
+            index_dir: Répertoire de l'index (Config.QUANTIZED_INDEX_DIR par défaut)
+
+        Returns:
+            Index chargé depuis le disque
+        """
+        mode = mode or Config.VECTOR_STORAGE
+        index_dir = index_dir or Config.QUANTIZED_INDEX_DIR
+        os.makedirs(index_dir, exist_ok=True)
+
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        codes, scales = quantize(vectors, mode)
+
+        np.save(os.path.join(index_dir, CODES_FILE), codes)
+        np.save(os.path.join(index_dir, SCALES_FILE), scales)
+        np.save(os.path.join(index_dir, FULL_FILE), vectors)
+
+        with open(os.path.join(index_dir, DOCUMENTS_FILE), 'w', encoding='utf-8') as f:
+            json.dump(
+                [{'page_content': d.page_content, 'metadata': d.metadata} for d in documents],
+                f,
+                ensure_ascii=False
+            )
+
+        with open(os.path.join(index_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump({
+                'mode': mode,
+                'embedding_model': Config.EMBEDDING_MODEL,
+                'num_vectors': int(vectors.shape[0]),
+                'dimension': int(vectors.shape[1])
+            }, f, indent=2)
+
+        return cls.load(index_dir)
+
+    @classmethod
+    def load(cls, index_dir: str = None) -> "QuantizedIndex":
+        """
+        Charge l'index : codes en mémoire, vecteurs float32 en memory-map
+
+        Args:
+            index_dir: Répertoire de l'index (Config.QUANTIZED_INDEX_DIR par défaut)
+
+        Returns:
+            Instance de QuantizedIndex
+        """
+        index_dir = index_dir or Config.QUANTIZED_INDEX_DIR
+
+        with open(os.path.join(index_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        with open(os.path.join(index_dir, DOCUMENTS_FILE), 'r', encoding='utf-8') as f:
+            documents = [Document(**d) for d in json.load(f)]
+
+        return cls(
+            mode=manifest['mode'],
+            codes=np.load(os.path.join(index_dir, CODES_FILE)),
+            scales=np.load(os.path.join(index_dir, SCALES_FILE)),
+            full_vectors=np.load(os.path.join(index_dir, FULL_FILE), mmap_mode='r'),
+            documents=documents
+        )
+
+    @staticmethod
+    def exists(index_dir: str = None) -> bool:
+        """Vérifie si un index quantifié a été construit"""
+        index_dir = index_dir or Config.QUANTIZED_INDEX_DIR
+        return os.path.exists(os.path.join(index_dir, MANIFEST_FILE))
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """Taille en mémoire des codes quantifiés comparée au float32"""
+        return {
+            'quantized': int(self.codes.nbytes + self.scales.nbytes),
+            'float32': int(self.full_vectors.shape[0] * self.full_vectors.shape[1] * 4)
+        }
+
+    def _first_pass_scores(self, query: np.ndarray) -> np.ndarray:
+        """
+        Scores approximatifs calculés sur les codes quantifiés
+
+        Les codes sont traités par blocs de SCORE_BLOCK_SIZE lignes : seul un
+        bloc est converti à la fois, jamais la matrice (n, d) entière.
+        """
+        scores = np.empty(self.codes.shape[0], dtype=np.float32)
+
+        if self.mode == "int8":
+            for start in range(0, self.codes.shape[0], SCORE_BLOCK_SIZE):
+                end = start + SCORE_BLOCK_SIZE
+                block = self.codes[start:end].astype(np.float32)
+                scores[start:end] = (block @ query) * self.scales[start:end]
+            return scores
+
+        # Mode binaire : similarité = - nombre de bits différents (Hamming)
+        query_bits = np.packbits(query > 0)
+        for start in range(0, self.codes.shape[0], SCORE_BLOCK_SIZE):
+            end = start + SCORE_BLOCK_SIZE
+            differing = _POPCOUNT[np.bitwise_xor(self.codes[start:end], query_bits)]
+            scores[start:end] = -differing.sum(axis=1, dtype=np.int32)
+        return scores
+
+    def search(
+        self,
+        query_embedding: List[float],
+        k: int,
+        num_candidates: int = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Recherche les k chunks les plus proches
+
+        Args:
+            query_embedding: Embedding de la requête
+            k: Nombre de résultats
+            num_candidates: Taille du lot re-scoré en pleine précision
+                (Config.RESCORE_FACTOR * k par défaut)
+
+        Returns:
+            Couples (document, distance) triés par distance croissante ; la
+            distance est la L2 au carré entre vecteurs normalisés, comme Chroma
+        """
+        if not self.documents:
+            return []
+
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        num_candidates = min(
+            len(self.documents),
+            max(k, num_candidates or Config.RESCORE_FACTOR * k)
+        )
+
+        # 1re passe : présélection sur les codes quantifiés
+        approx = self._first_pass_scores(query)
+        candidates = np.sort(np.argpartition(-approx, num_candidates - 1)[:num_candidates])
+
+        # 2e passe : re-scoring exact des seuls candidats (lecture disque)
+        exact = np.asarray(self.full_vectors[candidates]) @ query
+        order = np.argsort(-exact)[:k]
+        rows = candidates[order]
+
+        return [
+            (self.documents[row], float(2.0 * (1.0 - score)))
+            for row, score in zip(rows, exact[order])
+        ]
+
+
+def build_from_vectorstore(vectorstore, mode: str = None) -> QuantizedIndex:
+    """
+    Construit l'index quantifié à partir des embeddings d'une base Chroma
+
+    Args:
+        vectorstore: Instance Chroma contenant les chunks indexés
+        mode: Mode de quantification (Config.VECTOR_STORAGE par défaut)
+
+    Returns:
+        Index quantifié
+    """
+    data = vectorstore.get(include=["embeddings", "documents", "metadatas"])
+    documents = [
+        Document(page_content=text, metadata=metadata or {})
+        for text, metadata in zip(data['documents'], data['metadatas'])
+    ]
+    return QuantizedIndex.build(np.asarray(data['embeddings']), documents, mode=mode)
+
+
+def load_for_vectorstore(vectorstore, mode: str = None) -> QuantizedIndex:
+    """
+    Charge l'index quantifié s'il correspond à la base Chroma, sinon le reconstruit
+
+    L'index est considéré comme obsolète si son mode, son modèle d'embedding
+    ou son nombre de vecteurs diffère de la configuration et de la base
+    (après une réindexation par exemple).
+
+    Args:
+        vectorstore: Instance Chroma contenant les chunks indexés
+        mode: Mode de quantification (Config.VECTOR_STORAGE par défaut)
+
+    Returns:
+        Index quantifié à jour
+    """
+    mode = mode or Config.VECTOR_STORAGE
+
+    if QuantizedIndex.exists():
+        with open(os.path.join(Config.QUANTIZED_INDEX_DIR, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        expected = {
+            'mode': mode,
+            'embedding_model': Config.EMBEDDING_MODEL,
+            'num_vectors': vectorstore._collection.count()
+        }
+        if all(manifest.get(key) == value for key, value in expected.items()):
+            return QuantizedIndex.load()
+        print(f"Index quantifié obsolète ({manifest.get('num_vectors')} vecteurs, "
+              f"base: {expected['num_vectors']}) : reconstruction")
+
+    return build_from_vectorstore(vectorstore, mode=mode)
+
+
+def main():
+    """Construit l'index quantifié depuis la base ChromaDB existante"""
+    from src.data_ingestion import DataIngestion
+
+    mode = Config.VECTOR_STORAGE if Config.VECTOR_STORAGE != "float32" else "int8"
+    index = build_from_vectorstore(DataIngestion.load_existing_vectorstore(), mode=mode)
+
+    memory = index.memory_bytes()
+    print(f"Index {mode} construit: {len(index.documents)} vecteurs")
+    print(f"  Mémoire quantifiée: {memory['quantized']} octets (float32: {memory['float32']} octets)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 """
 Moteur RAG avec filtrage par profil utilisateur
 """
+import json
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import List, Dict, Optional
 from langchain_mistralai import ChatMistralAI
 from langchain_core.prompts.chat import ChatPromptTemplate
@@ -9,6 +13,13 @@ from langchain_community.vectorstores import Chroma
 
 from src.config import Config
 from src.data_ingestion import DataIngestion
+from src.sharding import ShardedRetriever, ShardUnavailableError, load_shard_manifest
+from src.quantization import load_for_vectorstore
+from src.deduplication import LOCATION_KEYS, expand_provenance, source_doc_ids
+from src.registry import DocumentRegistry
+from src.lexical import LexicalIndex
+from src.router import QueryRouter, TIER_EXTRACTIVE, TIER_FALLBACK, TIER_SMALL, find_answer_span
+from src.utils import split_profiles
 
 
 class RAGEngine:
@@ -21,14 +32,58 @@ class RAGEngine:
         # Charger la base vectorielle
         self.vectorstore = DataIngestion.load_existing_vectorstore()
         
+        # Registre des documents : permissions et affichage résolus par doc_id
+        self.registry = DocumentRegistry.open_default()
+        
+        # Base partitionnée : recherche scatter-gather sur les shards
+        self.sharded_retriever = None
+        manifest = load_shard_manifest()
+        if Config.SHARD_STRATEGY != "none" and manifest:
+            self.sharded_retriever = ShardedRetriever(
+                manifest,
+                self.vectorstore.embeddings,
+                registry=self.registry
+            )
+        
+        # Index quantifié : présélection int8/binaire puis re-scoring float32
+        # (reconstruit s'il ne correspond plus à la base Chroma)
+        self.quantized_index = None
+        if Config.VECTOR_STORAGE != "float32" and self.sharded_retriever is None:
+            self.quantized_index = load_for_vectorstore(self.vectorstore)
+        
         # Initialiser le LLM Mistral
         self.llm = ChatMistralAI(
             model=Config.LLM_MODEL,
             mistral_api_key=Config.MISTRAL_API_KEY,
             temperature=Config.TEMPERATURE,
-            max_tokens=Config.MAX_TOKENS
+            max_tokens=Config.MAX_TOKENS,
+            timeout=int(Config.GENERATION_BUDGET) + 1,
+            max_retries=Config.API_MAX_RETRIES
         )
         
+        # Petit modèle pour les questions simples, et routeur entre les niveaux
+        self.small_llm = ChatMistralAI(
+            model=Config.SMALL_LLM_MODEL,
+            mistral_api_key=Config.MISTRAL_API_KEY,
+            temperature=Config.TEMPERATURE,
+            max_tokens=Config.MAX_TOKENS,
+            timeout=int(Config.GENERATION_BUDGET) + 1,
+            max_retries=Config.API_MAX_RETRIES
+        )
+        self.router = QueryRouter()
+        
+        # Exécution sous délai : un appel trop lent est abandonné (le thread finit en arrière-plan)
+        self._executor = ThreadPoolExecutor(max_workers=4)
+        self._embedding_cache = OrderedDict()
+        
+        # Index lexical de secours (base non partitionnée), construit dès le
+        # démarrage sur un thread dédié pour ne pas occuper le pool des requêtes
+        self._background = ThreadPoolExecutor(max_workers=1)
+        self._lexical_index = None
+        self._lexical_future = None
+        if self.sharded_retriever is None:
+            self._start_lexical_build()
+        
         # Template de prompt
         self.prompt_template = ChatPromptTemplate.from_messages([
             ("system", """Tu es IntraBot, un assistant intelligent pour l'intranet d'entreprise.
@@ -69,12 +124,49 @@ DOCUMENTS DE RÉFÉRENCE:
         """
         filtered_docs = []
         
+        # Permissions et titres lus dans le registre au moment de la requête
+        records = self.registry.get_many(
+            [doc_id for doc in documents for doc_id in source_doc_ids(doc)]
+        )
+        
         for doc in documents:
-            profils_autorises = doc.metadata.get('profils_autorises', [])
+            # Sources du chunk (plusieurs si des quasi-doublons ont été fusionnés)
+            accessible_sources = [
+                {
+                    key: source[key]
+                    for key in ('filename', 'title', 'description', 'profils_autorises') + LOCATION_KEYS
+                    if key in source
+                }
+                for source in expand_provenance(doc, user_profile, records=records)
+            ]
             
             # Vérifier si le profil utilisateur est autorisé
-            if user_profile in profils_autorises:
-                filtered_docs.append(doc)
+            if not accessible_sources:
+                continue
+            
+            # Ne jamais exposer le titre, la section ou la page d'un document
+            # non accessible : la position vient de la source affichée
+            main_source = accessible_sources[0]
+            metadata = {
+                key: value for key, value in doc.metadata.items()
+                if key not in LOCATION_KEYS
+            }
+            metadata.update({
+                'doc_id': main_source['filename'],
+                'filename': main_source['filename'],
+                'title': main_source['title'],
+                'description': main_source['description'],
+                'profils_autorises': main_source['profils_autorises']
+            })
+            if main_source['filename'] == (doc.metadata.get('doc_id') or doc.metadata.get('filename')):
+                metadata.update({key: doc.metadata[key] for key in LOCATION_KEYS if key in doc.metadata})
+            metadata.update({key: main_source[key] for key in LOCATION_KEYS if key in main_source})
+            if len(accessible_sources) > 1:
+                metadata['provenance'] = json.dumps(accessible_sources, ensure_ascii=False)
+            else:
+                metadata.pop('provenance', None)
+            
+            filtered_docs.append(Document(page_content=doc.page_content, metadata=metadata))
         
         return filtered_docs
     
@@ -82,7 +174,9 @@ DOCUMENTS DE RÉFÉRENCE:
         self, 
         query: str, 
         user_profile: str,
-        k: int = None
+        k: int = None,
+        expand_parents: bool = True,
+        query_embedding: List[float] = None
     ) -> List[Document]:
         """
         Récupère les documents pertinents avec filtrage par profil
@@ -91,6 +185,9 @@ DOCUMENTS DE RÉFÉRENCE:
             query: Question de l'utilisateur
             user_profile: Profil de l'utilisateur
             k: Nombre de documents à récupérer
+            expand_parents: Élargir à la section parente quand plusieurs
+                de ses sous-sections sont retrouvées
+            query_embedding: Embedding déjà calculé de la question (optionnel)
             
         Returns:
             Documents pertinents et autorisés
@@ -98,15 +195,339 @@ DOCUMENTS DE RÉFÉRENCE:
         if k is None:
             k = Config.TOP_K_RESULTS
         
+        if query_embedding is None:
+            query_embedding = self._embed_query(query)
+        
         # Recherche de similarité (on récupère plus que nécessaire car on va filtrer)
-        all_docs = self.vectorstore.similarity_search(query, k=k*3)
+        if self.sharded_retriever is not None:
+            results = self.sharded_retriever.search(
+                query, user_profile, k=k*3, query_embedding=query_embedding
+            )
+        elif self.quantized_index is not None:
+            results = self.quantized_index.search(query_embedding, k=k*3)
+        else:
+            results = self.vectorstore.similarity_search_by_vector_with_relevance_scores(
+                query_embedding, k=k*3
+            )
+        
+        # La distance est conservée pour le routage des requêtes
+        all_docs = [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, 'distance': distance})
+            for doc, distance in results
+        ]
         
         # Filtrage par profil
         filtered_docs = self._filter_documents_by_profile(all_docs, user_profile)
         
         # Limiter au nombre demandé
+        filtered_docs = filtered_docs[:k]
+        
+        if expand_parents:
+            filtered_docs = self._expand_to_parent_sections(filtered_docs, user_profile)
+        
+        return filtered_docs
+    
+    def _fetch_section_chunks(self, parent_id: str) -> List[Document]:
+        """
+        Récupère tous les chunks rattachés à une section parente
+        
+        Args:
+            parent_id: Identifiant de la section parente
+            
+        Returns:
+            Chunks de la section (non filtrés)
+        """
+        where = {'parent_id': parent_id}
+        
+        if self.sharded_retriever is not None:
+            return self.sharded_retriever.get_documents(where)
+        
+        data = self.vectorstore.get(where=where, include=["documents", "metadatas"])
+        return [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(data['documents'], data['metadatas'])
+        ]
+    
+    def _expand_to_parent_sections(
+        self,
+        documents: List[Document],
+        user_profile: str
+    ) -> List[Document]:
+        """
+        Remplace les sous-sections d'un même parent par la section parente complète
+        
+        Les petites sections suffisent pour les questions précises ; la section
+        parente n'est chargée que si Config.PARENT_EXPANSION_MIN_HITS de ses
+        sous-sections ont été retrouvées. Le texte élargi est limité à
+        Config.PARENT_EXPANSION_MAX_CHARS : les passages retrouvés sont gardés,
+        puis complétés par leurs voisins les plus proches.
+        
+        Args:
+            documents: Documents filtrés, par pertinence décroissante
+            user_profile: Profil de l'utilisateur
+            
+        Returns:
+            Documents, avec les sections parentes élargies
+        """
+        hits = Counter(
+            doc.metadata['parent_id'] for doc in documents
+            if doc.metadata.get('parent_id')
+        )
+        
+        expanded_docs = []
+        expanded_parents = set()
+        
+        for doc in documents:
+            parent_id = doc.metadata.get('parent_id')
+            if not parent_id or hits[parent_id] < Config.PARENT_EXPANSION_MIN_HITS:
+                expanded_docs.append(doc)
+                continue
+            
+            if parent_id in expanded_parents:
+                continue
+            expanded_parents.add(parent_id)
+            
+            # Les chunks voisins repassent par le filtre de profil
+            siblings = self._filter_documents_by_profile(
+                self._fetch_section_chunks(parent_id),
+                user_profile
+            )
+            if not siblings:
+                expanded_docs.append(doc)
+                continue
+            
+            hit_indexes = [
+                d.metadata.get('chunk_index', 0) for d in documents
+                if d.metadata.get('parent_id') == parent_id
+            ]
+            selected = self._select_within_budget(siblings, hit_indexes)
+            
+            metadata = {**doc.metadata, 'section': doc.metadata.get('parent_section', '')}
+            pages = [s.metadata['page_number'] for s in selected if s.metadata.get('page_number')]
+            if pages:
+                metadata['page_number'] = min(pages)
+                metadata['page_end'] = max(pages)
+            
+            expanded_docs.append(Document(
+                page_content="\n\n".join(s.page_content for s in selected),
+                metadata=metadata
+            ))
+        
+        return expanded_docs
+    
+    @staticmethod
+    def _select_within_budget(siblings: List[Document], hit_indexes: List[int]) -> List[Document]:
+        """
+        Choisit les chunks d'une section parente dans la limite de Config.PARENT_EXPANSION_MAX_CHARS
+        
+        Args:
+            siblings: Chunks accessibles de la section parente
+            hit_indexes: Positions ('chunk_index') des chunks retrouvés par la recherche
+            
+        Returns:
+            Chunks retenus, dans l'ordre du document
+        """
+        def distance(chunk: Document) -> int:
+            index = chunk.metadata.get('chunk_index', 0)
+            return min(abs(index - hit) for hit in hit_indexes) if hit_indexes else index
+        
+        selected, total = [], 0
+        for chunk in sorted(siblings, key=distance):
+            # Les chunks retrouvés sont toujours gardés, les voisins selon le budget
+            if distance(chunk) > 0 and total + len(chunk.page_content) > Config.PARENT_EXPANSION_MAX_CHARS:
+                continue
+            selected.append(chunk)
+            total += len(chunk.page_content)
+        
+        return sorted(selected, key=lambda d: d.metadata.get('chunk_index', 0))
+    
+    def _embed_query(self, query: str) -> List[float]:
+        """
+        Vectorise la question, avec un cache des questions récentes
+        
+        Args:
+            query: Question de l'utilisateur
+            
+        Returns:
+            Embedding de la question
+        """
+        if query in self._embedding_cache:
+            self._embedding_cache.move_to_end(query)
+            return self._embedding_cache[query]
+        
+        embedding = self.vectorstore.embeddings.embed_query(query)
+        
+        self._embedding_cache[query] = embedding
+        if len(self._embedding_cache) > Config.EMBEDDING_CACHE_SIZE:
+            self._embedding_cache.popitem(last=False)
+        
+        return embedding
+    
+    def _run_with_deadline(self, timeout: float, func, *args, **kwargs):
+        """
+        Exécute une étape du pipeline dans la limite de son budget
+        
+        Args:
+            timeout: Délai maximal en secondes
+            func: Fonction à exécuter
+            
+        Returns:
+            (résultat, None) si la fonction a abouti, sinon (None, 'timeout')
+            si le délai est dépassé ou (None, 'error') en cas d'erreur
+        """
+        if timeout <= 0:
+            return None, 'timeout'
+        
+        future = self._executor.submit(func, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout), None
+        except FutureTimeoutError:
+            print(f"{func.__name__}: délai de {timeout:.1f}s dépassé")
+            return None, 'timeout'
+        except Exception as e:
+            print(f"{func.__name__}: erreur {e}")
+            return None, 'error'
+    
+    def _build_lexical_index(self) -> LexicalIndex:
+        """Construit l'index lexical à partir des chunks déjà stockés (base non partitionnée)"""
+        if self.quantized_index is not None:
+            documents = self.quantized_index.documents
+        else:
+            data = self.vectorstore.get(include=["documents", "metadatas"])
+            documents = [
+                Document(page_content=text, metadata=metadata or {})
+                for text, metadata in zip(data['documents'], data['metadatas'])
+            ]
+        return LexicalIndex(documents)
+    
+    def _start_lexical_build(self):
+        """Lance la construction de l'index lexical, hors du pool des requêtes"""
+        self._lexical_future = self._background.submit(self._build_lexical_index)
+    
+    def _get_lexical_index(self, timeout: float) -> Optional[LexicalIndex]:
+        """
+        Index lexical de secours, en attendant au plus `timeout` secondes qu'il soit prêt
+        
+        Returns:
+            Index lexical, ou None s'il n'est pas disponible à temps
+        """
+        if self._lexical_index is not None:
+            return self._lexical_index
+        
+        future = self._lexical_future
+        try:
+            self._lexical_index = future.result(timeout=max(timeout, 0))
+        except FutureTimeoutError:
+            print("Index lexical en cours de construction")
+        except Exception as e:
+            print(f"Index lexical indisponible : {e}")
+            if future is self._lexical_future:
+                self._start_lexical_build()
+        return self._lexical_index
+    
+    def _lexical_retrieve(
+        self,
+        query: str,
+        user_profile: str,
+        k: int = None,
+        timeout: float = None
+    ) -> List[Document]:
+        """
+        Recherche lexicale de secours, sans appel à l'API d'embeddings
+        
+        Sur une base partitionnée, chaque shard ne renvoie que les chunks
+        contenant les termes de la question (le corpus n'est jamais copié en
+        mémoire) ; sinon l'index TF-IDF construit au démarrage est utilisé.
+        
+        Args:
+            query: Question de l'utilisateur
+            user_profile: Profil de l'utilisateur
+            k: Nombre de documents à récupérer
+            timeout: Attente max (s) si l'index lexical n'est pas encore
+                construit (Config.RETRIEVAL_BUDGET par défaut)
+            
+        Returns:
+            Documents pertinents et autorisés
+        """
+        if k is None:
+            k = Config.TOP_K_RESULTS
+        if timeout is None:
+            timeout = Config.RETRIEVAL_BUDGET
+        
+        if self.sharded_retriever is not None:
+            try:
+                results = self.sharded_retriever.lexical_search(query, user_profile, k=k*3)
+            except ShardUnavailableError as e:
+                print(f"Recherche lexicale impossible : {e}")
+                return []
+            filtered_docs = self._filter_documents_by_profile([doc for doc, _ in results], user_profile)
+            return filtered_docs[:k]
+        
+        index = self._get_lexical_index(timeout)
+        if index is None:
+            return []
+        
+        results = index.search(query, k=k*3)
+        filtered_docs = self._filter_documents_by_profile([doc for doc, _ in results], user_profile)
         return filtered_docs[:k]
     
+    @staticmethod
+    def _format_pages(metadata: Dict) -> str:
+        """Page (« page X ») ou plage de pages (« pages X-Y ») d'un passage"""
+        first, last = metadata.get('page_number'), metadata.get('page_end')
+        if not first:
+            return ""
+        if last and last != first:
+            return f"pages {first}-{last}"
+        return f"page {first}"
+    
+    def _format_citation(self, doc: Document) -> str:
+        """Citation d'un passage : « Titre », page X le cas échéant"""
+        citation = f"« {doc.metadata.get('title', 'Document sans titre')} »"
+        if doc.metadata.get('page_number'):
+            citation += f", {self._format_pages(doc.metadata)}"
+        return citation
+    
+    def get_routing_stats(self) -> Dict[str, Dict]:
+        """
+        Statistiques de routage par niveau
+        
+        Returns:
+            Mapping niveau -> {'count', 'avg_latency', 'input_tokens', 'output_tokens', ...}
+        """
+        return self.router.get_stats()
+    
+    def _format_extractive_answer(self, documents: List[Document], failure: str = 'timeout') -> str:
+        """
+        Construit une réponse à partir des meilleurs passages, sans LLM
+        
+        Args:
+            documents: Documents pertinents et autorisés
+            failure: Cause du recours aux passages ('timeout' ou 'error')
+            
+        Returns:
+            Réponse extractive avec ses sources
+        """
+        if failure == 'error':
+            reason = "le modèle est momentanément indisponible"
+        else:
+            reason = "le modèle n'a pas répondu dans le délai imparti"
+        parts = [
+            f"⚠️ *Réponse extractive : {reason}. "
+            "Voici les passages les plus pertinents de la documentation.*"
+        ]
+        
+        for doc in documents[:Config.EXTRACTIVE_MAX_PASSAGES]:
+            citation = self._format_citation(doc)
+            
+            passage = doc.page_content.strip()
+            if len(passage) > 600:
+                passage = passage[:600].rsplit(" ", 1)[0] + "…"
+            
+            parts.append(f"> {passage}\n\n(Source : {citation})")
+        
+        return "\n\n".join(parts)
+    
     def generate_answer(
         self, 
         query: str, 
@@ -122,36 +543,122 @@ DOCUMENTS DE RÉFÉRENCE:
             return_sources: Inclure les sources dans la réponse
             
         Returns:
-            Dictionnaire avec la réponse et optionnellement les sources
+            Dictionnaire avec la réponse, le niveau de traitement ('route'),
+            l'usage du LLM ('usage'), les temps par étape ('timings'), les
+            budgets ('budgets'), les dégradations appliquées ('degraded') et
+            optionnellement les sources
         """
-        # Récupérer les documents pertinents
-        relevant_docs = self.retrieve_documents(query, user_profile)
+        start = time.perf_counter()
+        timings = {}
+        degraded = []
+        budgets = {
+            'total': Config.REQUEST_BUDGET,
+            'embedding': Config.EMBEDDING_BUDGET,
+            'retrieval': Config.RETRIEVAL_BUDGET,
+            'generation': Config.GENERATION_BUDGET
+        }
+        
+        def remaining(slice_budget: float) -> float:
+            return min(slice_budget, Config.REQUEST_BUDGET - (time.perf_counter() - start))
+        
+        # 1. Vectoriser la question
+        step = time.perf_counter()
+        query_embedding, _ = self._run_with_deadline(
+            remaining(Config.EMBEDDING_BUDGET), self._embed_query, query
+        )
+        timings['embedding'] = time.perf_counter() - step
+        
+        # 2. Récupérer les documents pertinents (recherche lexicale en secours)
+        step = time.perf_counter()
+        relevant_docs = None
+        if query_embedding is not None:
+            relevant_docs, _ = self._run_with_deadline(
+                remaining(Config.RETRIEVAL_BUDGET),
+                self.retrieve_documents,
+                query,
+                user_profile,
+                query_embedding=query_embedding
+            )
+        if relevant_docs is None:
+            degraded.append('lexical_retrieval')
+            relevant_docs = self._lexical_retrieve(
+                query, user_profile, timeout=remaining(Config.RETRIEVAL_BUDGET)
+            )
+        timings['retrieval'] = time.perf_counter() - step
         
         if not relevant_docs:
+            timings['total'] = time.perf_counter() - start
             return {
                 'answer': f"Désolé, je n'ai trouvé aucun document accessible pour votre profil '{user_profile}' "
                          f"qui réponde à votre question.",
                 'sources': [],
-                'profile': user_profile
+                'profile': user_profile,
+                'timings': timings,
+                'budgets': budgets,
+                'degraded': degraded
             }
         
-        # Préparer le contexte
-        context = self._format_context(relevant_docs)
+        # 3. Choisir le niveau de traitement (passage extrait, petit modèle, modèle complet)
+        route = self.router.route(query, relevant_docs)
+        answer = None
+        usage = None
+        timings['generation'] = 0.0
         
-        # Générer la réponse avec le LLM
-        prompt = self.prompt_template.format_messages(
-            context=context,
-            question=query
-        )
+        if route == TIER_EXTRACTIVE:
+            span = find_answer_span(query, relevant_docs[0])
+            if span:
+                relevant_docs = relevant_docs[:1]
+                answer = f"{span}\n\n(Source : {self._format_citation(relevant_docs[0])})"
+            else:
+                route = TIER_SMALL
         
-        response = self.llm.invoke(prompt)
-        answer = response.content
+        if answer is None:
+            if route == TIER_SMALL:
+                llm = self.small_llm
+                relevant_docs = relevant_docs[:Config.ROUTER_SMALL_TOP_K]
+            else:
+                llm = self.llm
+            
+            # Préparer le contexte
+            context = self._format_context(relevant_docs)
+            
+            # Générer la réponse avec le LLM (réponse extractive en secours)
+            prompt = self.prompt_template.format_messages(
+                context=context,
+                question=query
+            )
+            
+            step = time.perf_counter()
+            response, failure = self._run_with_deadline(
+                remaining(Config.GENERATION_BUDGET), llm.invoke, prompt
+            )
+            timings['generation'] = time.perf_counter() - step
+            
+            if response is not None:
+                answer = response.content
+                usage = getattr(response, 'usage_metadata', None)
+            else:
+                degraded.append('extractive_answer')
+                answer = self._format_extractive_answer(relevant_docs, failure)
+        
+        timings['total'] = time.perf_counter() - start
+        
+        # Une réponse de secours n'est pas imputée au niveau qui a échoué
+        is_fallback = 'extractive_answer' in degraded
+        self.router.record(TIER_FALLBACK if is_fallback else route, timings['total'], usage)
         
         # Préparer le résultat
+        is_extractive = route == TIER_EXTRACTIVE or is_fallback
         result = {
             'answer': answer,
             'profile': user_profile,
-            'num_sources': len(relevant_docs)
+            'num_sources': len(relevant_docs),
+            'mode': 'extractive' if is_extractive else 'generative',
+            'route': route,
+            'usage': dict(usage) if usage else {},
+            'timings': timings,
+            'budgets': budgets,
+            'degraded': degraded
         }
         
         if return_sources:
@@ -175,8 +682,15 @@ DOCUMENTS DE RÉFÉRENCE:
             title = doc.metadata.get('title', 'Document sans titre')
             content = doc.page_content
             
+            # Section et page pour permettre des citations précises
+            header = title
+            if doc.metadata.get('section'):
+                header += f" — {doc.metadata['section']}"
+            if doc.metadata.get('page_number'):
+                header += f", {self._format_pages(doc.metadata)}"
+            
             # context_parts.append(f"[Document {i}: {title}]\n{content}\n")
-            context_parts.append(f"[{title}]\n{content}\n")
+            context_parts.append(f"[{header}]\n{content}\n")
         
         return "\n".join(context_parts)
     
@@ -194,20 +708,19 @@ DOCUMENTS DE RÉFÉRENCE:
         seen_titles = set()
         
         for doc in documents:
-            title = doc.metadata.get('title', 'Document sans titre')
-            
-            # Éviter les doublons
-            if title not in seen_titles:
-                profils = doc.metadata.get('profils_autorises', [])
-            
-            # Si c'est une chaîne, la convertir en liste
-            if isinstance(profils, str):
-                profils = [profils]
+            # Un chunk dédupliqué liste tous ses documents d'origine
+            for source in expand_provenance(doc):
+                title = source['title']
+                
+                # Éviter les doublons
+                if title in seen_titles:
+                    continue
+                
                 sources.append({
                     'title': title,
-                    'filename': doc.metadata.get('filename', ''),
-                    'description': doc.metadata.get('description', ''),
-                    'profils': profils
+                    'filename': source['filename'],
+                    'description': source['description'],
+                    'profils': split_profiles(source['profils_autorises'])
                 })
                 seen_titles.add(title)
         
@@ -0,0 +1,300 @@
+"""
+Registre des documents (SQLite) : titres, descriptions, permissions et empreintes
+
+Le registre fait foi pour les permissions et l'affichage des sources : les
+chunks ne portent que l'identifiant de leur document (le nom de fichier), et
+les profils autorisés sont résolus au moment de la requête. Modifier les
+permissions d'un document prend donc effet immédiatement, sans réindexation.
+
+Le fichier metadata.json est réimporté dès que son contenu change : ses
+entrées remplacent alors celles du registre, et les documents qui n'y figurent
+plus sont retirés avec leurs profils.
+"""
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Optional, Set
+
+from src.config import Config
+from src.utils import file_sha256, split_profiles
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    content_hash TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS document_profiles (
+    doc_id TEXT NOT NULL REFERENCES documents(doc_id) ON DELETE CASCADE,
+    profile TEXT NOT NULL,
+    PRIMARY KEY (doc_id, profile)
+);
+CREATE INDEX IF NOT EXISTS idx_document_profiles_profile ON document_profiles(profile);
+CREATE TABLE IF NOT EXISTS registry_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+METADATA_HASH_KEY = "metadata_json_sha256"
+
+
+class DocumentRegistry:
+    """Registre indexé des documents et de leurs profils autorisés"""
+
+    def __init__(self, db_path: str = None):
+        """
+        Ouvre (et crée si besoin) le registre
+
+        Args:
+            db_path: Chemin de la base SQLite (Config.REGISTRY_DB par défaut)
+        """
+        self.db_path = db_path or Config.REGISTRY_DB
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Connexion courte par opération (utilisable depuis plusieurs threads)"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA foreign_keys = ON")
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @classmethod
+    def open_default(cls) -> "DocumentRegistry":
+        """
+        Ouvre le registre par défaut, synchronisé avec Config.METADATA_FILE
+
+        Returns:
+            Instance du registre
+        """
+        registry = cls()
+        if os.path.exists(Config.METADATA_FILE):
+            registry.sync_from_json(Config.METADATA_FILE)
+        return registry
+
+    def sync_from_json(self, path: str) -> bool:
+        """
+        Réimporte un fichier metadata.json si son contenu a changé depuis le dernier import
+
+        Args:
+            path: Chemin du fichier JSON
+
+        Returns:
+            True si le fichier a été réimporté
+        """
+        content_hash = file_sha256(path)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM registry_state WHERE key = ?",
+                (METADATA_HASH_KEY,)
+            ).fetchone()
+
+        if row is not None and row[0] == content_hash:
+            return False
+
+        count = self.import_from_json(path, prune=True)
+        print(f"Registre synchronisé avec {path}: {count} documents")
+        return True
+
+    def count(self) -> int:
+        """Nombre de documents enregistrés"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def import_from_json(self, path: str, prune: bool = False) -> int:
+        """
+        Importe en masse les documents d'un fichier metadata.json
+
+        Args:
+            path: Chemin du fichier JSON ({"documents": [...]})
+            prune: Supprimer du registre les documents absents du fichier
+
+        Returns:
+            Nombre de documents importés
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            documents = json.load(f)['documents']
+        content_hash = file_sha256(path)
+
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO documents (doc_id, title, description, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(doc_id) DO UPDATE SET
+                    title = excluded.title,
+                    description = excluded.description,
+                    updated_at = excluded.updated_at
+                """,
+                [
+                    (d['filename'], d.get('title', d['filename']), d.get('description', ''), now)
+                    for d in documents
+                ]
+            )
+            conn.executemany(
+                "DELETE FROM document_profiles WHERE doc_id = ?",
+                [(d['filename'],) for d in documents]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO document_profiles (doc_id, profile) VALUES (?, ?)",
+                [
+                    (d['filename'], profile)
+                    for d in documents
+                    for profile in split_profiles(d.get('profils_autorises'))
+                ]
+            )
+            if prune:
+                # Les profils des documents retirés suivent par ON DELETE CASCADE
+                conn.execute("CREATE TEMP TABLE imported_documents (doc_id TEXT PRIMARY KEY)")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO imported_documents (doc_id) VALUES (?)",
+                    [(d['filename'],) for d in documents]
+                )
+                removed = conn.execute(
+                    "DELETE FROM documents WHERE doc_id NOT IN (SELECT doc_id FROM imported_documents)"
+                ).rowcount
+                if removed:
+                    print(f"{removed} document(s) absent(s) de {path} retiré(s) du registre")
+            conn.execute(
+                "INSERT OR REPLACE INTO registry_state (key, value) VALUES (?, ?)",
+                (METADATA_HASH_KEY, content_hash)
+            )
+
+        return len(documents)
+
+    def set_profiles(self, doc_id: str, profiles: List[str]):
+        """
+        Remplace les profils autorisés d'un document (effet immédiat)
+
+        Args:
+            doc_id: Identifiant du document
+            profiles: Nouveaux profils autorisés (liste ou chaîne "p1, p2")
+        """
+        profiles = split_profiles(profiles)
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM documents WHERE doc_id = ?", (doc_id,)).fetchone() is None:
+                raise ValueError(f"Document inconnu dans le registre: {doc_id}")
+
+            conn.execute("DELETE FROM document_profiles WHERE doc_id = ?", (doc_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO document_profiles (doc_id, profile) VALUES (?, ?)",
+                [(doc_id, profile) for profile in profiles]
+            )
+            conn.execute(
+                "UPDATE documents SET updated_at = ? WHERE doc_id = ?",
+                (datetime.now().isoformat(timespec="seconds"), doc_id)
+            )
+
+    def set_content_hash(self, doc_id: str, content_hash: str):
+        """Enregistre l'empreinte du contenu indexé d'un document"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE documents SET content_hash = ? WHERE doc_id = ?",
+                (content_hash, doc_id)
+            )
+
+    def get_many(self, doc_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Informations d'affichage et permissions de plusieurs documents
+
+        Args:
+            doc_ids: Identifiants des documents
+
+        Returns:
+            Mapping doc_id -> {'filename', 'title', 'description',
+            'profils_autorises', 'content_hash'} (documents connus uniquement)
+        """
+        doc_ids = list(dict.fromkeys(doc_ids))
+        if not doc_ids:
+            return {}
+
+        placeholders = ", ".join("?" for _ in doc_ids)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT d.doc_id, d.title, d.description, d.content_hash,
+                       GROUP_CONCAT(p.profile, ', ')
+                FROM documents d
+                LEFT JOIN document_profiles p ON p.doc_id = d.doc_id
+                WHERE d.doc_id IN ({placeholders})
+                GROUP BY d.doc_id
+                """,
+                doc_ids
+            ).fetchall()
+
+        return {
+            doc_id: {
+                'filename': doc_id,
+                'title': title,
+                'description': description,
+                'profils_autorises': profils or '',
+                'content_hash': content_hash
+            }
+            for doc_id, title, description, content_hash, profils in rows
+        }
+
+    def get(self, doc_id: str) -> Optional[Dict]:
+        """Informations d'un document, ou None s'il est inconnu"""
+        return self.get_many([doc_id]).get(doc_id)
+
+    def list_documents(self) -> List[Dict]:
+        """Tous les documents enregistrés, triés par identifiant"""
+        with self._connect() as conn:
+            doc_ids = [row[0] for row in conn.execute("SELECT doc_id FROM documents ORDER BY doc_id")]
+        records = self.get_many(doc_ids)
+        return [records[doc_id] for doc_id in doc_ids]
+
+    def allowed_doc_ids(self, profile: str) -> Set[str]:
+        """Identifiants des documents accessibles à un profil"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT doc_id FROM document_profiles WHERE profile = ?",
+                (profile,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+
+def main():
+    """Administration du registre en ligne de commande"""
+    parser = argparse.ArgumentParser(description="Registre des documents IntraBot")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import-json", help="Importer un fichier metadata.json")
+    import_parser.add_argument("path", nargs="?", default=Config.METADATA_FILE)
+    import_parser.add_argument("--prune", action="store_true",
+                               help="Retirer les documents absents du fichier")
+
+    profiles_parser = subparsers.add_parser("set-profiles", help="Modifier les profils d'un document")
+    profiles_parser.add_argument("doc_id")
+    profiles_parser.add_argument("profiles", nargs="+")
+
+    subparsers.add_parser("list", help="Lister les documents")
+
+    args = parser.parse_args()
+    registry = DocumentRegistry()
+
+    if args.command == "import-json":
+        print(f"{registry.import_from_json(args.path, prune=args.prune)} documents importés")
+    elif args.command == "set-profiles":
+        registry.set_profiles(args.doc_id, args.profiles)
+        print(f"Profils de {args.doc_id}: {registry.get(args.doc_id)['profils_autorises']}")
+    else:
+        for doc in registry.list_documents():
+            print(f"{doc['filename']}: {doc['title']} [{doc['profils_autorises']}]")
+
+
+if __name__ == "__main__":
+    main()
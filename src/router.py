@@ -0,0 +1,203 @@
+"""
+Routage des requêtes : réponse extractive, petit modèle ou modèle complet
+"""
+import re
+import threading
+from typing import List, Dict, Optional
+
+from langchain_core.documents import Document
+
+from src.chunking import detect_heading
+from src.config import Config
+from src.lexical import STOPWORDS, tokenize
+
+
+TIER_EXTRACTIVE = "extractive"
+TIER_SMALL = "small"
+TIER_FULL = "full"
+TIERS = (TIER_EXTRACTIVE, TIER_SMALL, TIER_FULL)
+# Réponses extractives de secours (LLM en erreur ou hors délai), suivies à part
+TIER_FALLBACK = "fallback"
+
+# Questions factuelles courtes : une valeur, une date, un lieu, une personne
+_FACTUAL_PATTERN = re.compile(
+    r"^\s*(combien|quand|où|qui|quel|quelle|quels|quelles|est-ce que|y a-t-il)\b",
+    re.IGNORECASE
+)
+# Questions demandant une synthèse ou un raisonnement
+_COMPLEX_PATTERN = re.compile(
+    r"\b(comment|pourquoi|expliqu\w*|compar\w*|différence\w*|résum\w*|"
+    r"analys\w*|étapes|avantages|inconvénients|conseil\w*)\b",
+    re.IGNORECASE
+)
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def distance_to_similarity(distance: float) -> float:
+    """Similarité cosinus à partir d'une distance L2 au carré (vecteurs normalisés)"""
+    return 1.0 - distance / 2.0
+
+
+def _body_sentences(doc: Document) -> List[str]:
+    """
+    Phrases du passage, hors titres de section
+
+    Les titres sont reconnus comme au découpage (detect_heading) ou parce
+    qu'ils reprennent la section du chunk ('section', 'parent_section').
+    """
+    section_terms = [
+        set(tokenize(doc.metadata[key]))
+        for key in ('section', 'parent_section') if doc.metadata.get(key)
+    ]
+
+    sentences = []
+    previous_blank = True
+    for line in doc.page_content.splitlines():
+        is_heading = detect_heading(line, previous_blank) is not None
+        previous_blank = not line.strip()
+        if is_heading:
+            continue
+        for sentence in _SENTENCE_SPLIT.split(line):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            tokens = set(tokenize(sentence))
+            if any(tokens <= terms for terms in section_terms):
+                continue
+            sentences.append(sentence)
+    return sentences
+
+
+def find_answer_span(query: str, doc: Document) -> Optional[str]:
+    """
+    Extrait du passage la phrase (ou ligne) qui répond le mieux à la question
+
+    Une ligne se terminant par « : » est complétée par la liste qui la suit.
+    Seuls les mots porteurs de sens comptent : une phrase doit partager au
+    moins Config.ROUTER_EXTRACTIVE_MIN_OVERLAP d'entre eux avec la question
+    (tous, si la question en contient moins). Les titres de section et les
+    extraits qui ne font que reprendre les mots de la question sont écartés.
+
+    Args:
+        query: Question de l'utilisateur
+        doc: Passage le plus pertinent
+
+    Returns:
+        Extrait du passage, ou None si aucune phrase ne recoupe assez la question
+    """
+    terms = {t for t in tokenize(query) if t not in STOPWORDS}
+    if not terms:
+        return None
+
+    min_overlap = min(Config.ROUTER_EXTRACTIVE_MIN_OVERLAP, len(terms))
+    wants_number = query.strip().lower().startswith("combien")
+    sentences = _body_sentences(doc)
+
+    best_span, best_score = None, 0.0
+    for index, sentence in enumerate(sentences):
+        overlap = len(terms & set(tokenize(sentence)))
+        if overlap < min_overlap:
+            continue
+
+        span = [sentence]
+        if sentence.endswith(":"):
+            for following in sentences[index + 1:]:
+                if not following.startswith(("-", "•", "*")):
+                    break
+                span.append(following)
+        span = "\n".join(span)
+
+        # Un extrait sans autre information que la question n'y répond pas
+        if not {t for t in tokenize(span) if t not in STOPWORDS} - terms:
+            continue
+
+        score = overlap
+        if wants_number and re.search(r"\d", span):
+            score += 1
+        if score > best_score:
+            best_span, best_score = span, score
+
+    return best_span
+
+
+class QueryRouter:
+    """Choisit le niveau de traitement d'une requête et suit les statistiques par niveau"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {
+            tier: {'count': 0, 'total_latency': 0.0, 'input_tokens': 0, 'output_tokens': 0}
+            for tier in TIERS + (TIER_FALLBACK,)
+        }
+
+    def route(self, query: str, documents: List[Document]) -> str:
+        """
+        Classe une requête selon la marge des scores de recherche et sa forme
+
+        Args:
+            query: Question de l'utilisateur
+            documents: Documents retrouvés (avec la métadonnée 'distance'),
+                par pertinence décroissante
+
+        Returns:
+            TIER_EXTRACTIVE, TIER_SMALL ou TIER_FULL
+        """
+        if not Config.ROUTING_ENABLED:
+            return TIER_FULL
+
+        similarities = [
+            distance_to_similarity(doc.metadata['distance'])
+            for doc in documents if 'distance' in doc.metadata
+        ]
+        # Sans score (recherche lexicale de secours), on ne prend pas de risque
+        if not similarities:
+            return TIER_FULL
+
+        best = similarities[0]
+        margin = best - similarities[1] if len(similarities) > 1 else best
+
+        num_words = len(query.split())
+        is_factual = bool(_FACTUAL_PATTERN.match(query))
+        is_complex = bool(_COMPLEX_PATTERN.search(query))
+
+        if (is_factual and not is_complex
+                and num_words <= Config.ROUTER_SMALL_MAX_WORDS
+                and best >= Config.ROUTER_EXTRACTIVE_MIN_SCORE
+                and margin >= Config.ROUTER_EXTRACTIVE_MIN_MARGIN):
+            return TIER_EXTRACTIVE
+
+        if (not is_complex
+                and num_words <= Config.ROUTER_SMALL_MAX_WORDS
+                and best >= Config.ROUTER_SMALL_MIN_SCORE):
+            return TIER_SMALL
+
+        return TIER_FULL
+
+    def record(self, tier: str, latency: float, usage: Optional[Dict] = None):
+        """
+        Enregistre la latence et la consommation de tokens d'une requête
+
+        Args:
+            tier: Niveau ayant produit la réponse (TIER_FALLBACK pour une
+                réponse extractive de secours)
+            latency: Durée totale de la requête (s)
+            usage: Métadonnées d'usage du LLM ('input_tokens', 'output_tokens')
+        """
+        usage = usage or {}
+        with self._lock:
+            stats = self.stats[tier]
+            stats['count'] += 1
+            stats['total_latency'] += latency
+            stats['input_tokens'] += usage.get('input_tokens', 0)
+            stats['output_tokens'] += usage.get('output_tokens', 0)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Statistiques par niveau, avec la latence moyenne"""
+        with self._lock:
+            return {
+                tier: {
+                    **stats,
+                    'avg_latency': stats['total_latency'] / stats['count'] if stats['count'] else 0.0
+                }
+                for tier, stats in self.stats.items()
+            }
@@ -0,0 +1,397 @@
+"""
+Partitionnement de la base vectorielle en shards et recherche scatter-gather
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Tuple, Optional
+
+import chromadb
+import httpx
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+
+from src.config import Config
+from src.deduplication import source_doc_ids
+from src.lexical import STOPWORDS, LexicalIndex, tokenize
+from src.utils import split_profiles
+
+
+SHARD_MANIFEST_FILE = "shards.json"
+COLLECTION_NAME = "intrabot_docs"
+
+
+class ShardUnavailableError(RuntimeError):
+    """Aucun des shards interrogés n'a répondu"""
+
+
+def chunk_id(chunk: Document, index: int) -> str:
+    """Identifiant stable d'un chunk : fichier source + position"""
+    return f"{chunk.metadata.get('filename', 'unknown')}:{index}"
+
+
+def shard_name_for_chunk(chunk: Document, chunk_identifier: str) -> str:
+    """
+    Détermine le shard d'un chunk selon Config.SHARD_STRATEGY
+
+    Args:
+        chunk: Chunk avec ses métadonnées
+        chunk_identifier: Identifiant du chunk
+
+    Returns:
+        Nom du shard
+    """
+    if Config.SHARD_STRATEGY == "group":
+        # Un shard par groupe de documents partageant les mêmes profils
+        profils = sorted(split_profiles(chunk.metadata.get('profils_autorises', [])))
+        slug = re.sub(r"[^a-z0-9]+", "_", "_".join(profils).lower()).strip("_")
+        return f"group_{slug or 'aucun'}"
+
+    if Config.SHARD_STRATEGY == "hash":
+        digest = hashlib.md5(chunk_identifier.encode("utf-8")).hexdigest()
+        return f"shard_{int(digest, 16) % Config.NUM_SHARDS}"
+
+    raise ValueError(f"Stratégie de sharding inconnue: {Config.SHARD_STRATEGY}")
+
+
+def partition_chunks(chunks: List[Document]) -> Dict[str, Dict]:
+    """
+    Répartit les chunks dans leurs shards
+
+    Args:
+        chunks: Liste de chunks à indexer
+
+    Returns:
+        Mapping nom du shard -> {'documents', 'ids', 'profils', 'doc_ids'}
+    """
+    shards = {}
+    counters = {}
+
+    for chunk in chunks:
+        filename = chunk.metadata.get('filename', 'unknown')
+        index = counters.get(filename, 0)
+        counters[filename] = index + 1
+
+        identifier = chunk_id(chunk, index)
+        name = shard_name_for_chunk(chunk, identifier)
+
+        shard = shards.setdefault(name, {'documents': [], 'ids': [], 'profils': set(), 'doc_ids': set()})
+        shard['documents'].append(chunk)
+        shard['ids'].append(identifier)
+        shard['profils'].update(split_profiles(chunk.metadata.get('profils_autorises', [])))
+        shard['doc_ids'].update(source_doc_ids(chunk))
+
+    return shards
+
+
+def _parse_shard_hosts() -> Dict[str, Tuple[str, int]]:
+    """Lit Config.SHARD_HOSTS ("shard=hôte:port,...") en mapping"""
+    hosts = {}
+    for entry in Config.SHARD_HOSTS.split(","):
+        if "=" not in entry:
+            continue
+        name, address = entry.split("=", 1)
+        host, _, port = address.strip().partition(":")
+        hosts[name.strip()] = (host, int(port or 8000))
+    return hosts
+
+
+def shard_client(name: str):
+    """
+    Client Chroma d'un shard : serveur distant s'il est déclaré dans
+    Config.SHARD_HOSTS, sinon répertoire local dans Config.SHARDS_DIR
+
+    Les appels HTTP d'un shard distant sont bornés par Config.SHARD_TIMEOUT :
+    le client chromadb n'expose pas de délai et attend indéfiniment par défaut.
+
+    Args:
+        name: Nom du shard
+
+    Returns:
+        Client chromadb
+    """
+    hosts = _parse_shard_hosts()
+
+    if name in hosts:
+        host, port = hosts[name]
+        client = chromadb.HttpClient(host=host, port=port)
+        session = getattr(getattr(client, '_server', None), '_session', None)
+        if isinstance(session, httpx.Client):
+            session.timeout = httpx.Timeout(Config.SHARD_TIMEOUT)
+        return client
+
+    return chromadb.PersistentClient(path=os.path.join(Config.SHARDS_DIR, name))
+
+
+def open_shard(name: str, embeddings) -> Chroma:
+    """
+    Ouvre un shard (voir shard_client)
+
+    Args:
+        name: Nom du shard
+        embeddings: Fonction d'embedding
+
+    Returns:
+        Instance Chroma du shard
+    """
+    return Chroma(
+        client=shard_client(name),
+        embedding_function=embeddings,
+        collection_name=COLLECTION_NAME
+    )
+
+
+def write_shard_manifest(shards: Dict[str, Dict]) -> str:
+    """
+    Enregistre la liste des shards, de leurs documents et de leurs profils autorisés
+
+    Returns:
+        Chemin du manifeste
+    """
+    os.makedirs(Config.SHARDS_DIR, exist_ok=True)
+    manifest = {
+        'strategy': Config.SHARD_STRATEGY,
+        'shards': {
+            name: {
+                'profils': sorted(shard['profils']),
+                'doc_ids': sorted(shard.get('doc_ids', [])),
+                'num_chunks': len(shard['documents'])
+            }
+            for name, shard in shards.items()
+        }
+    }
+
+    path = os.path.join(Config.SHARDS_DIR, SHARD_MANIFEST_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_shard_manifest() -> Optional[Dict]:
+    """Charge le manifeste des shards, ou None si la base n'est pas partitionnée"""
+    path = os.path.join(Config.SHARDS_DIR, SHARD_MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ShardedRetriever:
+    """Recherche scatter-gather sur un ensemble de shards"""
+
+    def __init__(self, manifest: Dict, embeddings, timeout: float = None, registry=None):
+        """
+        Initialise le retriever partitionné
+
+        Les shards sont ouverts à leur première interrogation ; un shard qui
+        ne peut pas être ouvert est ignoré et sera retenté à la requête suivante.
+
+        Args:
+            manifest: Manifeste des shards (voir write_shard_manifest)
+            embeddings: Fonction d'embedding utilisée pour la requête
+            timeout: Délai max (s) accordé à chaque shard
+            registry: Registre des documents ; s'il est fourni, l'accès aux
+                shards est déterminé par les permissions courantes du registre
+        """
+        self.embeddings = embeddings
+        self.timeout = Config.SHARD_TIMEOUT if timeout is None else timeout
+        self.registry = registry
+        self.shard_profiles = {
+            name: set(info.get('profils', []))
+            for name, info in manifest['shards'].items()
+        }
+        self.shard_doc_ids = {
+            name: set(info.get('doc_ids', []))
+            for name, info in manifest['shards'].items()
+        }
+        self.shards = {}
+        self._lock = threading.Lock()
+        # Un thread par shard : un appel bloqué n'occupe que le thread de son
+        # shard, qui est ignoré tant que cet appel n'est pas terminé
+        self._executors = {
+            name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"shard-{name}")
+            for name in self.shard_profiles
+        }
+        self._pending = {}
+
+    def _open(self, name: str) -> Chroma:
+        """Ouvre un shard à la demande et le garde en cache"""
+        with self._lock:
+            shard = self.shards.get(name)
+        if shard is None:
+            shard = open_shard(name, self.embeddings)
+            with self._lock:
+                self.shards[name] = shard
+        return shard
+
+    def _call(self, name: str, method: str, *args, **kwargs):
+        """Appelle une méthode d'un shard, en l'ouvrant si nécessaire"""
+        return getattr(self._open(name), method)(*args, **kwargs)
+
+    def _scatter(self, shard_names: List[str], method: str, *args, **kwargs) -> Dict[str, object]:
+        """
+        Exécute le même appel sur plusieurs shards en parallèle
+
+        Returns:
+            Mapping nom du shard -> résultat, pour les shards ayant répondu à temps
+        """
+        futures = {}
+        for name in shard_names:
+            # Vérification et soumission atomiques : deux requêtes simultanées
+            # ne peuvent pas empiler d'appels sur un même shard
+            with self._lock:
+                pending = self._pending.get(name)
+                if pending is not None and not pending.done():
+                    print(f"Shard {name} ignoré : appel précédent toujours en cours")
+                    continue
+                future = self._executors[name].submit(self._call, name, method, *args, **kwargs)
+                self._pending[name] = future
+            futures[future] = name
+
+        done, not_done = wait(futures, timeout=self.timeout)
+
+        for future in not_done:
+            print(f"Shard {futures[future]} ignoré : délai de {self.timeout}s dépassé")
+
+        results = {}
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                print(f"Shard {futures[future]} ignoré : {e}")
+        return results
+
+    def shards_for_profile(self, user_profile: str) -> List[str]:
+        """Shards contenant au moins un document accessible au profil"""
+        if self.registry is not None and all(self.shard_doc_ids.values()):
+            allowed = self.registry.allowed_doc_ids(user_profile)
+            return [
+                name for name, doc_ids in self.shard_doc_ids.items()
+                if doc_ids & allowed
+            ]
+
+        return [
+            name for name, profils in self.shard_profiles.items()
+            if user_profile in profils
+        ]
+
+    def search(
+        self,
+        query: str,
+        user_profile: str,
+        k: int,
+        query_embedding: List[float] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Interroge les shards accessibles en parallèle et fusionne le top-k
+
+        Args:
+            query: Question de l'utilisateur
+            user_profile: Profil de l'utilisateur
+            k: Nombre de résultats par shard et après fusion
+            query_embedding: Embedding déjà calculé de la requête (optionnel)
+
+        Returns:
+            Couples (document, distance) triés par distance croissante
+
+        Raises:
+            ShardUnavailableError: Aucun shard accessible n'a répondu
+        """
+        shard_names = self.shards_for_profile(user_profile)
+        if not shard_names:
+            return []
+
+        # La requête n'est vectorisée qu'une seule fois pour tous les shards
+        if query_embedding is None:
+            query_embedding = self.embeddings.embed_query(query)
+
+        responses = self._scatter(
+            shard_names,
+            'similarity_search_by_vector_with_relevance_scores',
+            query_embedding,
+            k
+        )
+        if not responses:
+            raise ShardUnavailableError(f"Aucun shard n'a répondu parmi {', '.join(shard_names)}")
+
+        results = [item for response in responses.values() for item in response]
+        results.sort(key=lambda item: item[1])
+        return results[:k]
+
+    def lexical_search(self, query: str, user_profile: str, k: int) -> List[Tuple[Document, float]]:
+        """
+        Recherche lexicale de secours, sans embedding ni copie du corpus
+
+        Chaque shard accessible ne renvoie que les chunks contenant un terme
+        de la question (filtre 'where_document' de Chroma, limité à
+        Config.LEXICAL_SHARD_CANDIDATES chunks) ; ces candidats sont ensuite
+        classés par TF-IDF.
+
+        Args:
+            query: Question de l'utilisateur
+            user_profile: Profil de l'utilisateur
+            k: Nombre de résultats
+
+        Returns:
+            Couples (document, score) par score décroissant
+
+        Raises:
+            ShardUnavailableError: Aucun shard accessible n'a répondu
+        """
+        shard_names = self.shards_for_profile(user_profile)
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t not in STOPWORDS]
+        if not shard_names or not terms:
+            return []
+
+        # Le filtre est sensible à la casse : terme en minuscules et en début de phrase
+        clauses = [
+            {'$contains': variant}
+            for term in terms
+            for variant in dict.fromkeys((term, term.capitalize()))
+        ]
+        responses = self._scatter(
+            shard_names,
+            'get',
+            where_document=clauses[0] if len(clauses) == 1 else {'$or': clauses},
+            limit=Config.LEXICAL_SHARD_CANDIDATES,
+            include=["documents", "metadatas"]
+        )
+        if not responses:
+            raise ShardUnavailableError(f"Aucun shard n'a répondu parmi {', '.join(shard_names)}")
+
+        candidates = [
+            Document(page_content=text, metadata=metadata or {})
+            for data in responses.values()
+            for text, metadata in zip(data['documents'], data['metadatas'])
+        ]
+        return LexicalIndex(candidates).search(query, k=k)
+
+    def get_documents(self, where: Dict = None) -> List[Document]:
+        """
+        Récupère sur tous les shards les chunks correspondant à un filtre de métadonnées
+
+        Args:
+            where: Filtre Chroma (ex: {'parent_id': ...}), None pour tous les chunks
+
+        Returns:
+            Chunks trouvés dans les shards ayant répondu à temps
+        """
+        responses = self._scatter(
+            list(self.shard_profiles),
+            'get',
+            where=where,
+            include=["documents", "metadatas"]
+        )
+
+        documents = []
+        for data in responses.values():
+            documents.extend(
+                Document(page_content=text, metadata=metadata or {})
+                for text, metadata in zip(data['documents'], data['metadatas'])
+            )
+
+        return documents
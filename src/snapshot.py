@@ -0,0 +1,320 @@
+"""
+Export et import de snapshots versionnés de l'index vectoriel
+
+Un snapshot est un répertoire autonome :
+    manifest.json    modèle d'embedding, paramètres de découpage, sommes SHA-256
+    chunks.arrow     identifiants, textes et métadonnées (Arrow IPC non compressé,
+                     ouvert par memory-map et converti par lots à l'import)
+    embeddings.npy   matrice float32 (n, d), chargée par memory-map
+
+Il peut être intégré à l'image Docker ou copié depuis un répertoire
+d'artefacts, puis importé dans ChromaDB sans recalculer les embeddings.
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+from typing import List, Dict, Optional
+
+import chromadb
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+from langchain_core.documents import Document
+
+from src.config import Config
+from src.quantization import QuantizedIndex
+from src.deduplication import source_doc_ids
+from src.utils import file_sha256, split_profiles
+from src.sharding import (
+    COLLECTION_NAME,
+    load_shard_manifest,
+    shard_client,
+    shard_name_for_chunk,
+    write_shard_manifest,
+)
+
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+CHUNKS_FILE = "chunks.arrow"
+EMBEDDINGS_FILE = "embeddings.npy"
+BATCH_SIZE = 1000
+
+
+class SnapshotError(ValueError):
+    """Snapshot corrompu ou incompatible avec la configuration courante"""
+
+
+def _chunking_params() -> Dict:
+    """Paramètres de découpage dont dépend le contenu de l'index"""
+    return {
+        'strategy': Config.CHUNKING_STRATEGY,
+        'chunk_size': Config.CHUNK_SIZE,
+        'chunk_overlap': Config.CHUNK_OVERLAP,
+    }
+
+
+def _source_collections() -> List:
+    """Collections Chroma à exporter : tous les shards, ou la collection unique"""
+    manifest = load_shard_manifest()
+    if Config.SHARD_STRATEGY != "none" and manifest:
+        return [
+            shard_client(name).get_collection(COLLECTION_NAME)
+            for name in manifest['shards']
+        ]
+
+    client = chromadb.PersistentClient(path=Config.CHROMA_DB_DIR)
+    return [client.get_collection(COLLECTION_NAME)]
+
+
+def export_snapshot(output_dir: str = None) -> str:
+    """
+    Exporte l'index courant dans un nouveau snapshot versionné
+
+    Args:
+        output_dir: Répertoire des snapshots (Config.SNAPSHOT_DIR par défaut)
+
+    Returns:
+        Chemin du snapshot créé
+    """
+    version = datetime.now().strftime("%Y%m%dT%H%M%S")
+    path = os.path.join(output_dir or Config.SNAPSHOT_DIR, f"intrabot-{version}")
+    os.makedirs(path, exist_ok=True)
+
+    ids, texts, metadatas, vectors = [], [], [], []
+    for collection in _source_collections():
+        total = collection.count()
+        for offset in range(0, total, BATCH_SIZE):
+            data = collection.get(
+                limit=BATCH_SIZE,
+                offset=offset,
+                include=["embeddings", "documents", "metadatas"]
+            )
+            ids.extend(data['ids'])
+            texts.extend(data['documents'])
+            metadatas.extend(json.dumps(m or {}, ensure_ascii=False) for m in data['metadatas'])
+            vectors.extend(data['embeddings'])
+
+    if not ids:
+        raise SnapshotError("Index vide : rien à exporter")
+
+    embeddings = np.asarray(vectors, dtype=np.float32)
+    np.save(os.path.join(path, EMBEDDINGS_FILE), embeddings)
+
+    table = pa.table({
+        'id': pa.array(ids, pa.string()),
+        'document': pa.array(texts, pa.string()),
+        'metadata': pa.array(metadatas, pa.string()),
+    })
+    # Sans compression : les colonnes sont lues directement dans le fichier mappé
+    with ipc.new_file(os.path.join(path, CHUNKS_FILE), table.schema) as writer:
+        writer.write_table(table)
+
+    manifest = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'snapshot_version': version,
+        'created_at': datetime.now().isoformat(timespec="seconds"),
+        'embedding_model': Config.EMBEDDING_MODEL,
+        'embedding_dimension': int(embeddings.shape[1]),
+        'num_chunks': len(ids),
+        'chunking': _chunking_params(),
+        'checksums': {
+            name: file_sha256(os.path.join(path, name))
+            for name in (CHUNKS_FILE, EMBEDDINGS_FILE)
+        },
+    }
+    with open(os.path.join(path, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    print(f"Snapshot exporté: {path} ({len(ids)} chunks)")
+    return path
+
+
+def find_latest_snapshot(snapshot_dir: str = None) -> Optional[str]:
+    """
+    Trouve le snapshot le plus récent d'un répertoire d'artefacts
+
+    Returns:
+        Chemin du snapshot, ou None si aucun n'est disponible
+    """
+    snapshot_dir = snapshot_dir or Config.SNAPSHOT_DIR
+    if not os.path.isdir(snapshot_dir):
+        return None
+
+    candidates = sorted(
+        name for name in os.listdir(snapshot_dir)
+        if os.path.exists(os.path.join(snapshot_dir, name, MANIFEST_FILE))
+    )
+    return os.path.join(snapshot_dir, candidates[-1]) if candidates else None
+
+
+def load_manifest(path: str, verify_checksums: bool = True) -> Dict:
+    """
+    Charge et valide le manifeste d'un snapshot
+
+    Args:
+        path: Chemin du snapshot
+        verify_checksums: Vérifier les sommes SHA-256 des fichiers
+
+    Returns:
+        Manifeste
+
+    Raises:
+        SnapshotError: Snapshot corrompu ou incompatible avec Config
+    """
+    with open(os.path.join(path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    if manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"Format de snapshot non supporté: {manifest.get('format_version')}")
+
+    if manifest['embedding_model'] != Config.EMBEDDING_MODEL:
+        raise SnapshotError(
+            f"Modèle d'embedding incompatible: {manifest['embedding_model']} "
+            f"(configuration: {Config.EMBEDDING_MODEL})"
+        )
+
+    if manifest['chunking'] != _chunking_params():
+        raise SnapshotError(
+            f"Paramètres de découpage incompatibles: {manifest['chunking']} "
+            f"(configuration: {_chunking_params()})"
+        )
+
+    if verify_checksums:
+        for name, expected in manifest['checksums'].items():
+            if file_sha256(os.path.join(path, name)) != expected:
+                raise SnapshotError(f"Somme de contrôle invalide pour {name}")
+
+    return manifest
+
+
+def read_snapshot(path: str):
+    """
+    Ouvre les données d'un snapshot par memory-map
+
+    Le fichier Arrow n'étant pas compressé, la table référence directement
+    les pages du fichier mappé : rien n'est copié tant qu'on ne convertit pas
+    ses colonnes.
+
+    Returns:
+        (table Arrow des chunks, matrice d'embeddings en memory-map)
+    """
+    with pa.memory_map(os.path.join(path, CHUNKS_FILE), 'r') as source:
+        table = ipc.open_file(source).read_all()
+    embeddings = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode='r')
+    return table, embeddings
+
+
+def import_snapshot(path: str = None, verify_checksums: bool = True) -> int:
+    """
+    Importe un snapshot dans ChromaDB (ou dans les shards) sans ré-embedding
+
+    Args:
+        path: Chemin du snapshot (le plus récent de Config.SNAPSHOT_DIR par défaut)
+        verify_checksums: Vérifier les sommes SHA-256 avant l'import
+
+    Returns:
+        Nombre de chunks importés
+    """
+    path = path or find_latest_snapshot()
+    if path is None:
+        raise SnapshotError(f"Aucun snapshot trouvé dans {Config.SNAPSHOT_DIR}")
+
+    manifest = load_manifest(path, verify_checksums=verify_checksums)
+    table, embeddings = read_snapshot(path)
+    sharded = Config.SHARD_STRATEGY != "none"
+
+    collections = {}
+
+    def collection_for(name):
+        """Collection cible, vidée à sa première utilisation"""
+        if name not in collections:
+            client = shard_client(name) if name else chromadb.PersistentClient(path=Config.CHROMA_DB_DIR)
+            try:
+                client.delete_collection(COLLECTION_NAME)
+            except Exception:
+                pass
+            collections[name] = client.get_or_create_collection(COLLECTION_NAME)
+        return collections[name]
+
+    shards = {}
+    # L'index quantifié est écrit en une fois : lui seul garde tous les chunks
+    documents = [] if Config.VECTOR_STORAGE != "float32" else None
+
+    # Conversion en objets Python lot par lot : seul le lot courant est copié
+    # hors du fichier mappé
+    offset = 0
+    for batch in table.to_batches(max_chunksize=BATCH_SIZE):
+        ids = batch.column('id').to_pylist()
+        texts = batch.column('document').to_pylist()
+        metadatas = [json.loads(m) for m in batch.column('metadata').to_pylist()]
+
+        # Répartition des lignes du lot par collection cible
+        targets = {}
+        for row, (chunk_identifier, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+            name = None
+            if sharded:
+                name = shard_name_for_chunk(Document(page_content=text, metadata=metadata), chunk_identifier)
+            targets.setdefault(name, []).append(row)
+
+        for name, rows in targets.items():
+            collection_for(name).add(
+                ids=[ids[row] for row in rows],
+                documents=[texts[row] for row in rows],
+                metadatas=[metadatas[row] for row in rows],
+                embeddings=np.asarray(embeddings[[offset + row for row in rows]]),
+            )
+
+            if name:
+                shard = shards.setdefault(name, {'documents': [], 'profils': set(), 'doc_ids': set()})
+                shard['documents'].extend(offset + row for row in rows)
+                for row in rows:
+                    shard['profils'].update(split_profiles(metadatas[row].get('profils_autorises')))
+                    shard['doc_ids'].update(
+                        source_doc_ids(Document(page_content=texts[row], metadata=metadatas[row]))
+                    )
+
+        if documents is not None:
+            documents.extend(Document(page_content=t, metadata=m) for t, m in zip(texts, metadatas))
+        offset += len(ids)
+
+    if shards:
+        write_shard_manifest(shards)
+
+    if documents is not None:
+        QuantizedIndex.build(embeddings, documents)
+
+    print(f"Snapshot {manifest['snapshot_version']} importé: {offset} chunks")
+    return offset
+
+
+def main():
+    """Export / import de snapshots en ligne de commande"""
+    parser = argparse.ArgumentParser(description="Snapshots de l'index IntraBot")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Exporter l'index courant")
+    export_parser.add_argument("--output", default=None, help="Répertoire des snapshots")
+
+    import_parser = subparsers.add_parser("import", help="Importer un snapshot")
+    import_parser.add_argument("path", nargs="?", default=None, help="Chemin du snapshot")
+    import_parser.add_argument("--no-verify", action="store_true", help="Ne pas vérifier les checksums")
+    import_parser.add_argument(
+        "--if-present",
+        action="store_true",
+        help="Ne rien faire si aucun snapshot n'est disponible"
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_snapshot(args.output)
+    elif args.if_present and args.path is None and find_latest_snapshot() is None:
+        print(f"Aucun snapshot dans {Config.SNAPSHOT_DIR} : import ignoré")
+    else:
+        import_snapshot(args.path, verify_checksums=not args.no_verify)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Fonctions utilitaires partagées par les modules d'ingestion, de recherche et d'administration
+"""
+import hashlib
+from typing import List
+
+
+def split_profiles(profils) -> List[str]:
+    """
+    Normalise des profils autorisés en liste sans doublons
+
+    Args:
+        profils: Liste de profils, ou chaîne "profil1, profil2" (format des
+            métadonnées Chroma et du registre)
+
+    Returns:
+        Profils dans leur ordre d'apparition
+    """
+    if profils is None:
+        return []
+    if isinstance(profils, str):
+        profils = profils.split(",")
+
+    result = []
+    for profil in profils:
+        profil = str(profil).strip()
+        if profil and profil not in result:
+            result.append(profil)
+    return result
+
+
+def file_sha256(path: str) -> str:
+    """Somme SHA-256 du contenu d'un fichier, lue par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
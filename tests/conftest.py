@@ -0,0 +1,76 @@
+"""
+Fixtures partagées : registre SQLite temporaire et chunks de test
+"""
+import json
+
+import pytest
+from langchain_core.documents import Document
+
+from src.registry import DocumentRegistry
+
+
+TEXT = (
+    "Les congés payés sont de vingt-cinq jours ouvrés par an pour tout salarié "
+    "présent dans l'entreprise au premier juin."
+)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Registre contenant un document restreint et un document public"""
+    metadata_file = tmp_path / "metadata.json"
+    metadata_file.write_text(json.dumps({
+        'documents': [
+            {
+                'filename': 'plan_social.txt',
+                'title': 'Plan social confidentiel',
+                'description': 'Réservé à la direction',
+                'profils_autorises': ['Direction']
+            },
+            {
+                'filename': 'guide.txt',
+                'title': 'Guide du salarié',
+                'description': 'Guide général',
+                'profils_autorises': ['Direction', 'Employé']
+            }
+        ]
+    }), encoding='utf-8')
+
+    registry = DocumentRegistry(str(tmp_path / "registry.sqlite3"))
+    registry.import_from_json(str(metadata_file))
+    return registry
+
+
+def make_chunk(doc_id: str, title: str, profils: str, **location) -> Document:
+    """Chunk portant le texte commun, tel que produit par l'ingestion"""
+    return Document(
+        page_content=TEXT,
+        metadata={
+            'doc_id': doc_id,
+            'filename': doc_id,
+            'title': title,
+            'description': '',
+            'profils_autorises': profils,
+            **location
+        }
+    )
+
+
+@pytest.fixture
+def restricted_chunk():
+    """Chunk du document réservé à la direction"""
+    return make_chunk(
+        'plan_social.txt', 'Plan social confidentiel', 'Direction',
+        section='Licenciements prévus en 2025', parent_id='plan_social.txt#3',
+        page_number=7, chunk_index=4
+    )
+
+
+@pytest.fixture
+def public_chunk():
+    """Chunk du document accessible à tous les employés"""
+    return make_chunk(
+        'guide.txt', 'Guide du salarié', 'Direction, Employé',
+        section='Congés payés', parent_id='guide.txt#1',
+        page_number=2, chunk_index=1
+    )
@@ -0,0 +1,96 @@
+"""
+Tests du découpage selon la structure des documents
+"""
+import pytest
+from langchain_core.documents import Document
+
+from src.chunking import StructureAwareSplitter, detect_heading
+
+
+@pytest.mark.parametrize("line, previous_blank, expected", [
+    ("## Congés payés", False, (2, "Congés payés")),
+    ("Article 3 - Durée du travail", False, (1, "Article 3 - Durée du travail")),
+    ("CHAPITRE II", False, (1, "CHAPITRE II")),
+    ("Engagement n° 3 : le respect de l'égalité entre les femmes et les hommes", False,
+     (1, "Engagement n° 3 : le respect de l'égalité entre les femmes et les hommes")),
+    ("N° 2 - Objet du contrat", False, (1, "N° 2 - Objet du contrat")),
+    ("1. Délai de Prévenance", False, (2, "1. Délai de Prévenance")),
+    ("2.3 Validation", False, (3, "2.3 Validation")),
+    ("Congés Annuels", True, (1, "Congés Annuels")),
+])
+def test_detect_heading(line, previous_blank, expected):
+    assert detect_heading(line, previous_blank) == expected
+
+
+@pytest.mark.parametrize("line, previous_blank", [
+    ("", True),
+    ("Congés Annuels", False),                       # titre simple sans ligne vide avant
+    ("Le délai est d'une semaine.", True),           # phrase
+    ("En cas de conflits, l'ordre de priorité est:", True),
+    ("- Ancienneté dans l'entreprise", True),         # élément de liste
+    ("engagement de la direction", True),
+    ("Article " + "x" * 100, True),                  # trop long
+])
+def test_detect_heading_rejects(line, previous_blank):
+    assert detect_heading(line, previous_blank) is None
+
+
+def page(text, number, source="data/raw/contrat.pdf"):
+    """Page de PDF telle que chargée par PyPDFLoader (numérotée à partir de 0)"""
+    return Document(page_content=text, metadata={'source': source, 'page': number})
+
+
+def test_sections_follow_headings_across_pages():
+    pages = [
+        page("Préambule du contrat.\nEngagement n° 1 : la liberté\nTexte un.\n"
+             "Engagement n° 2 : l'égalité", 0),
+        page("Suite du texte deux.\nEngagement n° 3 : la dignité\nTexte trois.", 1),
+    ]
+
+    chunks = StructureAwareSplitter(chunk_size=500, chunk_overlap=0).split_documents(pages)
+
+    assert [(c.metadata['page_number'], c.metadata['section'], c.page_content) for c in chunks] == [
+        (1, '', "Préambule du contrat."),
+        (1, "Engagement n° 1 : la liberté", "Engagement n° 1 : la liberté\nTexte un."),
+        # Le titre seul en bas de page ne produit pas de chunk, la section continue page 2
+        (2, "Engagement n° 2 : l'égalité", "Suite du texte deux."),
+        (2, "Engagement n° 3 : la dignité", "Engagement n° 3 : la dignité\nTexte trois."),
+    ]
+    assert [c.metadata['chunk_index'] for c in chunks] == [0, 1, 2, 3]
+    assert chunks[2].metadata['section_id'] == "contrat.pdf#1"
+
+
+def test_subsections_point_to_their_parent():
+    text = (
+        "Procédure de Demande\n\n"
+        "Introduction de la procédure.\n"
+        "1. Délai de Prévenance\n"
+        "Une semaine à l'avance.\n"
+        "2. Validation\n"
+        "Validation par le manager.\n\n"
+        "Congés sans Solde\n"
+        "Accord de la direction."
+    )
+    doc = Document(page_content=text, metadata={'source': 'data/raw/rh_1.txt'})
+
+    chunks = StructureAwareSplitter(chunk_size=500, chunk_overlap=0).split_documents([doc])
+    by_section = {c.metadata['section']: c.metadata for c in chunks}
+
+    assert by_section['1. Délai de Prévenance']['parent_section'] == 'Procédure de Demande'
+    assert by_section['1. Délai de Prévenance']['parent_id'] == 'rh_1.txt#0'
+    assert by_section['2. Validation']['section_id'] == 'rh_1.txt#2'
+    assert by_section['2. Validation']['parent_id'] == 'rh_1.txt#0'
+    assert by_section['Congés sans Solde']['parent_id'] == 'rh_1.txt#3'
+    assert 'page_number' not in by_section['Congés sans Solde']
+
+
+def test_long_section_is_split_with_shared_metadata():
+    sentences = " ".join(f"Phrase numéro {i} du règlement intérieur." for i in range(40))
+    doc = Document(page_content=f"Article 1 - Règlement\n{sentences}", metadata={'source': 'reglement.txt'})
+
+    chunks = StructureAwareSplitter(chunk_size=200, chunk_overlap=0).split_documents([doc])
+
+    assert len(chunks) > 1
+    assert all(len(c.page_content) <= 200 for c in chunks)
+    assert {c.metadata['section_id'] for c in chunks} == {'reglement.txt#0'}
+    assert [c.metadata['chunk_index'] for c in chunks] == list(range(len(chunks)))
@@ -0,0 +1,52 @@
+"""
+Tests de la fusion des quasi-doublons et du filtrage de leur provenance
+"""
+import json
+
+from src.deduplication import collapse_near_duplicates, expand_provenance, source_doc_ids
+
+
+def test_collapse_merges_sources_and_profiles(restricted_chunk, public_chunk):
+    chunks = collapse_near_duplicates([restricted_chunk, public_chunk])
+
+    assert len(chunks) == 1
+    assert source_doc_ids(chunks[0]) == ['plan_social.txt', 'guide.txt']
+    assert chunks[0].metadata['profils_autorises'] == "Direction, Employé"
+
+
+def test_provenance_keeps_each_source_location(restricted_chunk, public_chunk):
+    chunk = collapse_near_duplicates([restricted_chunk, public_chunk])[0]
+    sources = {s['filename']: s for s in json.loads(chunk.metadata['provenance'])}
+
+    assert sources['guide.txt']['section'] == 'Congés payés'
+    assert sources['guide.txt']['page_number'] == 2
+    assert sources['plan_social.txt']['section'] == 'Licenciements prévus en 2025'
+
+
+def test_expand_provenance_keeps_only_accessible_sources(restricted_chunk, public_chunk):
+    chunk = collapse_near_duplicates([restricted_chunk, public_chunk])[0]
+
+    sources = expand_provenance(chunk, 'Employé')
+
+    assert [s['filename'] for s in sources] == ['guide.txt']
+    assert all(s['title'] != 'Plan social confidentiel' for s in sources)
+
+
+def test_expand_provenance_reads_permissions_from_registry(registry, restricted_chunk, public_chunk):
+    chunk = collapse_near_duplicates([restricted_chunk, public_chunk])[0]
+
+    # Les profils stockés dans le chunk sont ignorés au profit du registre
+    registry.set_profiles('guide.txt', ['Direction'])
+    records = registry.get_many(source_doc_ids(chunk))
+
+    assert expand_provenance(chunk, 'Employé', records=records) == []
+    assert len(expand_provenance(chunk, 'Direction', records=records)) == 2
+
+
+def test_distinct_chunks_are_not_merged(restricted_chunk, public_chunk):
+    public_chunk.page_content = "Le télétravail est possible deux jours par semaine après accord du manager."
+
+    chunks = collapse_near_duplicates([restricted_chunk, public_chunk])
+
+    assert len(chunks) == 2
+    assert all('provenance' not in chunk.metadata for chunk in chunks)
@@ -0,0 +1,185 @@
+"""
+Tests de l'index quantifié (int8 et binaire)
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+import src.quantization as quantization
+from src.config import Config
+from src.quantization import MANIFEST_FILE, QuantizedIndex, load_for_vectorstore, quantize
+from src.router import distance_to_similarity
+
+
+def random_unit_vectors(n, d=64, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, d)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_documents(n):
+    return [Document(page_content=f"Chunk {i}", metadata={'row': i}) for i in range(n)]
+
+
+def exact_top_k(vectors, query, k):
+    return list(np.argsort(-(vectors @ query))[:k])
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'QUANTIZED_INDEX_DIR', str(tmp_path / "quantized"))
+    # Petits blocs : la 1re passe traverse plusieurs blocs
+    monkeypatch.setattr(quantization, 'SCORE_BLOCK_SIZE', 64)
+    return Config.QUANTIZED_INDEX_DIR
+
+
+def test_int8_round_trip_error_is_small():
+    vectors = random_unit_vectors(200)
+
+    codes, scales = quantize(vectors, "int8")
+    restored = codes.astype(np.float32) * scales[:, None]
+
+    assert codes.dtype == np.int8
+    # Erreur d'arrondi bornée par un demi-pas de quantification
+    assert np.all(np.abs(restored - vectors) <= scales[:, None] / 2 + 1e-6)
+    cosines = np.sum(restored * vectors, axis=1) / np.linalg.norm(restored, axis=1)
+    assert cosines.min() > 0.999
+
+
+def test_binary_codes_keep_signs():
+    vectors = random_unit_vectors(10)
+
+    codes, scales = quantize(vectors, "binary")
+
+    assert codes.shape == (10, 8) and scales.size == 0
+    np.testing.assert_array_equal(np.unpackbits(codes, axis=1).astype(bool), vectors > 0)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        quantize(random_unit_vectors(2), "float16")
+
+
+def near_queries(vectors, count=20, seed=1):
+    """Requêtes proches de chunks tirés au hasard, comme une question sur un passage précis"""
+    rng = np.random.default_rng(seed)
+    for target in rng.choice(len(vectors), size=count, replace=False):
+        query = vectors[target] + 0.05 * rng.standard_normal(vectors.shape[1]).astype(np.float32)
+        yield query / np.linalg.norm(query)
+
+
+def test_int8_search_matches_exact_top_k(index_dir):
+    vectors = random_unit_vectors(500)
+    index = QuantizedIndex.build(vectors, make_documents(500), mode="int8")
+
+    for query in near_queries(vectors):
+        results = index.search(query.tolist(), k=5, num_candidates=20)
+
+        assert [doc.metadata['row'] for doc, _ in results] == exact_top_k(vectors, query, 5)
+
+
+def test_binary_search_recall(index_dir):
+    vectors = random_unit_vectors(500)
+    index = QuantizedIndex.build(vectors, make_documents(500), mode="binary")
+
+    found = 0
+    for query in near_queries(vectors):
+        rows = [doc.metadata['row'] for doc, _ in index.search(query.tolist(), k=5, num_candidates=100)]
+        expected = exact_top_k(vectors, query, 5)
+
+        # 1 bit par dimension : le plus proche est toujours retrouvé, les
+        # suivants (quasi orthogonaux sur des vecteurs aléatoires) en majorité
+        assert rows[0] == expected[0]
+        found += len(set(rows) & set(expected))
+
+    assert found / (20 * 5) >= 0.85
+
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_rescoring_all_candidates_is_exact(index_dir, mode):
+    vectors = random_unit_vectors(300)
+    index = QuantizedIndex.build(vectors, make_documents(300), mode=mode)
+
+    for query in near_queries(vectors, count=5):
+        results = index.search(query.tolist(), k=10, num_candidates=300)
+
+        assert [doc.metadata['row'] for doc, _ in results] == exact_top_k(vectors, query, 10)
+
+
+def test_distance_is_squared_l2_and_matches_router_similarity(index_dir):
+    vectors = random_unit_vectors(50)
+    index = QuantizedIndex.build(vectors, make_documents(50), mode="int8")
+    query = random_unit_vectors(1, seed=2)[0]
+
+    results = index.search(query.tolist(), k=5, num_candidates=50)
+
+    distances = [distance for _, distance in results]
+    assert distances == sorted(distances)
+    for doc, distance in results:
+        vector = vectors[doc.metadata['row']]
+        assert distance == pytest.approx(np.sum((vector - query) ** 2), abs=1e-5)
+        assert distance_to_similarity(distance) == pytest.approx(float(vector @ query), abs=1e-5)
+
+
+class FakeCollection:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def count(self):
+        return len(self.vectors)
+
+
+class FakeVectorStore:
+    """Base Chroma réduite à ce que lit l'index quantifié"""
+
+    def __init__(self, vectors):
+        self._collection = FakeCollection(vectors)
+        self.get_calls = 0
+
+    def get(self, include=None):
+        self.get_calls += 1
+        vectors = self._collection.vectors
+        return {
+            'embeddings': vectors,
+            'documents': [f"Chunk {i}" for i in range(len(vectors))],
+            'metadatas': [{'row': i} for i in range(len(vectors))],
+        }
+
+
+def read_manifest(index_dir):
+    with open(os.path.join(index_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_load_for_vectorstore_reuses_matching_index(index_dir):
+    vectorstore = FakeVectorStore(random_unit_vectors(30))
+
+    load_for_vectorstore(vectorstore, mode="int8")
+    index = load_for_vectorstore(vectorstore, mode="int8")
+
+    assert vectorstore.get_calls == 1
+    assert len(index.documents) == 30
+
+
+def test_load_for_vectorstore_rebuilds_on_mode_change(index_dir):
+    vectorstore = FakeVectorStore(random_unit_vectors(30))
+    load_for_vectorstore(vectorstore, mode="int8")
+
+    index = load_for_vectorstore(vectorstore, mode="binary")
+
+    assert vectorstore.get_calls == 2
+    assert index.mode == "binary"
+    assert read_manifest(index_dir)['mode'] == "binary"
+
+
+def test_load_for_vectorstore_rebuilds_on_count_change(index_dir):
+    load_for_vectorstore(FakeVectorStore(random_unit_vectors(30)), mode="int8")
+    reindexed = FakeVectorStore(random_unit_vectors(45, seed=3))
+
+    index = load_for_vectorstore(reindexed, mode="int8")
+
+    assert reindexed.get_calls == 1
+    assert len(index.documents) == 45
+    assert read_manifest(index_dir)['num_vectors'] == 45
@@ -0,0 +1,76 @@
+"""
+Tests du filtrage par profil du moteur RAG (sans appel aux API Mistral)
+"""
+import pytest
+from langchain_core.documents import Document
+
+from src.deduplication import collapse_near_duplicates
+from src.rag_engine import RAGEngine
+
+
+RESTRICTED_VALUES = ['plan_social.txt', 'Plan social confidentiel', 'Licenciements prévus en 2025']
+
+
+@pytest.fixture
+def engine(registry):
+    """Moteur réduit au registre : seul le filtrage est exercé"""
+    engine = object.__new__(RAGEngine)
+    engine.registry = registry
+    return engine
+
+
+def assert_no_restricted_value(doc: Document):
+    """Aucune métadonnée (provenance comprise) ne mentionne le document restreint"""
+    exposed = " ".join(str(value) for value in doc.metadata.values())
+    for value in RESTRICTED_VALUES:
+        assert value not in exposed
+    assert doc.metadata.get('page_number') != 7
+
+
+def test_restricted_document_is_dropped(engine, restricted_chunk):
+    assert engine._filter_documents_by_profile([restricted_chunk], 'Employé') == []
+
+
+def test_merged_chunk_exposes_only_accessible_source(engine, restricted_chunk, public_chunk):
+    merged = collapse_near_duplicates([restricted_chunk, public_chunk])
+
+    [doc] = engine._filter_documents_by_profile(merged, 'Employé')
+
+    assert doc.metadata['title'] == 'Guide du salarié'
+    assert doc.metadata['section'] == 'Congés payés'
+    assert doc.metadata['page_number'] == 2
+    assert doc.metadata['parent_id'] == 'guide.txt#1'
+    assert 'provenance' not in doc.metadata
+    assert_no_restricted_value(doc)
+
+
+def test_unknown_location_is_dropped(engine, restricted_chunk, public_chunk):
+    # Source dont la position n'est pas connue (chunk sans section ni page)
+    for key in ('section', 'page_number', 'parent_id', 'chunk_index'):
+        public_chunk.metadata.pop(key)
+    merged = collapse_near_duplicates([restricted_chunk, public_chunk])
+
+    [doc] = engine._filter_documents_by_profile(merged, 'Employé')
+
+    assert 'section' not in doc.metadata
+    assert 'page_number' not in doc.metadata
+    assert 'parent_id' not in doc.metadata
+    assert_no_restricted_value(doc)
+
+
+def test_profile_with_full_access_keeps_canonical_location(engine, restricted_chunk, public_chunk):
+    merged = collapse_near_duplicates([restricted_chunk, public_chunk])
+
+    [doc] = engine._filter_documents_by_profile(merged, 'Direction')
+
+    assert doc.metadata['title'] == 'Plan social confidentiel'
+    assert doc.metadata['section'] == 'Licenciements prévus en 2025'
+    assert doc.metadata['page_number'] == 7
+
+
+def test_permission_change_applies_without_reindexing(engine, registry, public_chunk):
+    assert len(engine._filter_documents_by_profile([public_chunk], 'Employé')) == 1
+
+    registry.set_profiles('guide.txt', ['Direction'])
+
+    assert engine._filter_documents_by_profile([public_chunk], 'Employé') == []
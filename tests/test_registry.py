@@ -0,0 +1,99 @@
+"""
+Tests du registre des documents
+"""
+import json
+import os
+
+import pytest
+
+from src.config import Config
+from src.registry import DocumentRegistry
+
+
+def test_import_splits_and_dedupes_profiles(tmp_path):
+    metadata_file = tmp_path / "metadata.json"
+    metadata_file.write_text(json.dumps({
+        'documents': [
+            {'filename': 'a.txt', 'title': 'A', 'profils_autorises': "RH, Manager, RH"},
+            {'filename': 'b.txt', 'title': 'B', 'profils_autorises': ['RH', 'RH']}
+        ]
+    }), encoding='utf-8')
+
+    registry = DocumentRegistry(str(tmp_path / "registry.sqlite3"))
+    registry.import_from_json(str(metadata_file))
+
+    assert registry.get('a.txt')['profils_autorises'] == "Manager, RH"
+    assert registry.get('b.txt')['profils_autorises'] == "RH"
+
+
+def test_set_profiles_takes_effect(registry):
+    assert 'guide.txt' in registry.allowed_doc_ids('Employé')
+
+    registry.set_profiles('guide.txt', "Direction, RH, RH")
+
+    assert 'guide.txt' not in registry.allowed_doc_ids('Employé')
+    assert 'guide.txt' in registry.allowed_doc_ids('RH')
+    assert registry.get('guide.txt')['profils_autorises'] == "Direction, RH"
+
+
+def test_set_profiles_rejects_unknown_document(registry):
+    with pytest.raises(ValueError):
+        registry.set_profiles('inconnu.txt', ['RH'])
+
+
+def test_open_default_resyncs_when_metadata_changes(tmp_path, monkeypatch):
+    metadata_file = tmp_path / "metadata.json"
+    monkeypatch.setattr(Config, 'METADATA_FILE', str(metadata_file))
+    monkeypatch.setattr(Config, 'REGISTRY_DB', str(tmp_path / "registry.sqlite3"))
+
+    def write_metadata(profils):
+        metadata_file.write_text(json.dumps({
+            'documents': [{'filename': 'a.txt', 'title': 'A', 'profils_autorises': profils}]
+        }), encoding='utf-8')
+
+    write_metadata(['RH'])
+    assert DocumentRegistry.open_default().allowed_doc_ids('RH') == {'a.txt'}
+
+    # Une modification faite en base n'est pas écrasée tant que le JSON ne change pas
+    DocumentRegistry.open_default().set_profiles('a.txt', ['Manager'])
+    assert DocumentRegistry.open_default().allowed_doc_ids('Manager') == {'a.txt'}
+
+    write_metadata(['Direction'])
+    registry = DocumentRegistry.open_default()
+    assert registry.allowed_doc_ids('Direction') == {'a.txt'}
+    assert registry.allowed_doc_ids('Manager') == set()
+    assert os.path.exists(Config.REGISTRY_DB)
+
+
+def test_resync_removes_documents_missing_from_metadata(tmp_path, monkeypatch):
+    metadata_file = tmp_path / "metadata.json"
+    monkeypatch.setattr(Config, 'METADATA_FILE', str(metadata_file))
+    monkeypatch.setattr(Config, 'REGISTRY_DB', str(tmp_path / "registry.sqlite3"))
+
+    def write_metadata(filenames):
+        metadata_file.write_text(json.dumps({
+            'documents': [
+                {'filename': filename, 'title': filename, 'profils_autorises': ['RH']}
+                for filename in filenames
+            ]
+        }), encoding='utf-8')
+
+    write_metadata(['a.txt', 'secret.txt'])
+    assert DocumentRegistry.open_default().allowed_doc_ids('RH') == {'a.txt', 'secret.txt'}
+
+    write_metadata(['a.txt'])
+    registry = DocumentRegistry.open_default()
+    assert registry.allowed_doc_ids('RH') == {'a.txt'}
+    assert [doc['filename'] for doc in registry.list_documents()] == ['a.txt']
+    assert registry.get('secret.txt') is None
+
+
+def test_import_without_prune_keeps_other_documents(registry, tmp_path):
+    metadata_file = tmp_path / "extra.json"
+    metadata_file.write_text(json.dumps({
+        'documents': [{'filename': 'extra.txt', 'title': 'Extra', 'profils_autorises': 'RH'}]
+    }), encoding='utf-8')
+
+    registry.import_from_json(str(metadata_file))
+
+    assert {doc['filename'] for doc in registry.list_documents()} == {'extra.txt', 'guide.txt', 'plan_social.txt'}
@@ -0,0 +1,150 @@
+"""
+Tests du routage des requêtes et de l'extraction de réponse
+"""
+import pytest
+from langchain_core.documents import Document
+
+from src.config import Config
+from src.router import (
+    QueryRouter, TIER_EXTRACTIVE, TIER_FULL, TIER_SMALL, distance_to_similarity, find_answer_span
+)
+
+
+DELAI_CHUNK = Document(
+    page_content=(
+        "1. Délai de Prévenance\n"
+        "- Congés de moins de 5 jours: 1 semaine à l'avance\n"
+        "- Congés de 5 jours et plus: 1 mois à l'avance"
+    ),
+    metadata={'section': '1. Délai de Prévenance', 'parent_section': 'Procédure de Demande'}
+)
+
+
+@pytest.fixture(autouse=True)
+def thresholds(monkeypatch):
+    """Seuils fixés pour ne pas dépendre de la configuration"""
+    monkeypatch.setattr(Config, 'ROUTING_ENABLED', True)
+    monkeypatch.setattr(Config, 'ROUTER_EXTRACTIVE_MIN_SCORE', 0.80)
+    monkeypatch.setattr(Config, 'ROUTER_EXTRACTIVE_MIN_MARGIN', 0.05)
+    monkeypatch.setattr(Config, 'ROUTER_EXTRACTIVE_MIN_OVERLAP', 2)
+    monkeypatch.setattr(Config, 'ROUTER_SMALL_MIN_SCORE', 0.75)
+    monkeypatch.setattr(Config, 'ROUTER_SMALL_MAX_WORDS', 12)
+
+
+def scored(*similarities):
+    """Documents retrouvés avec la distance correspondant à chaque similarité"""
+    return [
+        Document(page_content="Passage", metadata={'distance': 2.0 * (1.0 - similarity)})
+        for similarity in similarities
+    ]
+
+
+def test_span_skips_heading_lines():
+    assert find_answer_span("Quel est le délai de prévenance ?", DELAI_CHUNK) is None
+
+
+def test_span_skips_section_title_repeated_in_text():
+    doc = Document(
+        page_content="Délai de Prévenance\nLe délai de prévenance est fixé à deux semaines.",
+        metadata={'section': '1. Délai de Prévenance'}
+    )
+
+    assert find_answer_span("Quel est le délai de prévenance ?", doc) == (
+        "Le délai de prévenance est fixé à deux semaines."
+    )
+
+
+def test_span_requires_content_beyond_query_words():
+    doc = Document(page_content="Le délai de prévenance.\nAutre sujet sans rapport.")
+
+    assert find_answer_span("Quel est le délai de prévenance ?", doc) is None
+
+
+def test_span_requires_minimum_overlap():
+    doc = Document(page_content="Le délai de paiement est de trente jours.")
+
+    assert find_answer_span("Quel est le délai de prévenance ?", doc) is None
+
+
+def test_span_ignores_stopword_only_question():
+    assert find_answer_span("Quel est le ?", DELAI_CHUNK) is None
+
+
+def test_span_prefers_numbers_for_combien():
+    doc = Document(page_content=(
+        "Les congés payés sont appréciés par tous les salariés.\n"
+        "Les congés payés sont de 25 jours ouvrés par an."
+    ))
+
+    assert find_answer_span("Combien de jours de congés payés ?", doc) == (
+        "Les congés payés sont de 25 jours ouvrés par an."
+    )
+
+
+def test_span_includes_list_after_colon():
+    doc = Document(page_content=(
+        "En cas de conflits, l'ordre de priorité est:\n"
+        "- Situation familiale\n"
+        "- Ancienneté dans l'entreprise\n"
+        "Les demandes sont traitées sous cinq jours."
+    ))
+
+    assert find_answer_span("Quel est l'ordre de priorité en cas de conflits ?", doc) == (
+        "En cas de conflits, l'ordre de priorité est:\n- Situation familiale\n- Ancienneté dans l'entreprise"
+    )
+
+
+def test_distance_to_similarity():
+    assert distance_to_similarity(0.0) == 1.0
+    assert distance_to_similarity(2.0) == 0.0
+    assert distance_to_similarity(0.4) == pytest.approx(0.8)
+
+
+@pytest.mark.parametrize("similarities, expected", [
+    ((0.90, 0.70), TIER_EXTRACTIVE),
+    ((0.90, 0.88), TIER_SMALL),       # marge insuffisante
+    ((0.90,), TIER_EXTRACTIVE),       # un seul passage : la marge est le score
+    ((0.78, 0.50), TIER_SMALL),       # sous le seuil extractif
+    ((0.70, 0.40), TIER_FULL),        # sous le seuil du petit modèle
+])
+def test_route_thresholds_and_margin(similarities, expected):
+    router = QueryRouter()
+
+    assert router.route("Quel est le délai de prévenance ?", scored(*similarities)) == expected
+
+
+def test_route_non_factual_question_is_not_extractive():
+    router = QueryRouter()
+
+    assert router.route("Délai de prévenance des congés ?", scored(0.95, 0.60)) == TIER_SMALL
+
+
+@pytest.mark.parametrize("query", [
+    "Quel est le délai et pourquoi ?",
+    "Comment poser des congés ?",
+    "Quelle différence entre RTT et congés ?",
+])
+def test_route_complex_questions_go_to_full_model(query):
+    router = QueryRouter()
+
+    assert router.route(query, scored(0.95, 0.60)) == TIER_FULL
+
+
+def test_route_long_question_goes_to_full_model():
+    router = QueryRouter()
+    query = "Quel est le délai de prévenance pour des congés de plus de cinq jours en été ?"
+
+    assert router.route(query, scored(0.95, 0.60)) == TIER_FULL
+
+
+def test_route_lexical_results_without_score_go_to_full_model():
+    router = QueryRouter()
+    lexical = [Document(page_content="Passage", metadata={'doc_id': 'rh_1.txt'})]
+
+    assert router.route("Quel est le délai de prévenance ?", lexical) == TIER_FULL
+
+
+def test_route_disabled(monkeypatch):
+    monkeypatch.setattr(Config, 'ROUTING_ENABLED', False)
+
+    assert QueryRouter().route("Quel est le délai de prévenance ?", scored(0.95, 0.60)) == TIER_FULL
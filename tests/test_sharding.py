@@ -0,0 +1,149 @@
+"""
+Tests de la recherche scatter-gather sur des shards factices (sans serveur Chroma)
+"""
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+import src.sharding as sharding
+from src.sharding import ShardedRetriever, ShardUnavailableError
+
+
+class FakeShard:
+    """Shard en mémoire renvoyant des résultats fixes, éventuellement après un délai"""
+
+    def __init__(self, results, delay=0.0, error=None):
+        self.results = results
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k):
+        self.calls += 1
+        if self.delay:
+            self.release.wait(self.delay)
+        if self.error:
+            raise self.error
+        return self.results[:k]
+
+
+def hit(doc_id, distance):
+    return Document(page_content=f"Passage de {doc_id}", metadata={'doc_id': doc_id}), distance
+
+
+@pytest.fixture
+def shards(monkeypatch):
+    """Remplace l'ouverture des shards par des shards factices"""
+    fakes = {}
+
+    def fake_open(name, embeddings):
+        if name not in fakes:
+            raise ConnectionError(f"{name} injoignable")
+        return fakes[name]
+
+    monkeypatch.setattr(sharding, 'open_shard', fake_open)
+    yield fakes
+    for shard in fakes.values():
+        shard.release.set()
+
+
+def make_retriever(shard_specs, timeout=0.5, registry=None):
+    """Retriever sur un manifeste {nom: (profils, doc_ids)}"""
+    manifest = {
+        'shards': {
+            name: {'profils': profils, 'doc_ids': doc_ids}
+            for name, (profils, doc_ids) in shard_specs.items()
+        }
+    }
+    return ShardedRetriever(manifest, embeddings=None, timeout=timeout, registry=registry)
+
+
+def search(retriever, profile, k=3):
+    return retriever.search("question", profile, k=k, query_embedding=[0.1, 0.2])
+
+
+def test_results_are_merged_by_distance(shards):
+    shards['s0'] = FakeShard([hit('a', 0.1), hit('b', 0.7)])
+    shards['s1'] = FakeShard([hit('c', 0.3), hit('d', 0.5)])
+    retriever = make_retriever({'s0': (['RH'], []), 's1': (['RH'], [])})
+
+    results = search(retriever, 'RH', k=3)
+
+    assert [doc.metadata['doc_id'] for doc, _ in results] == ['a', 'c', 'd']
+    assert [distance for _, distance in results] == [0.1, 0.3, 0.5]
+
+
+def test_manifest_profiles_select_shards(shards):
+    shards['rh'] = FakeShard([hit('rh', 0.1)])
+    shards['tech'] = FakeShard([hit('tech', 0.2)])
+    retriever = make_retriever({'rh': (['RH'], []), 'tech': (['Technique'], [])})
+
+    results = search(retriever, 'Technique')
+
+    assert [doc.metadata['doc_id'] for doc, _ in results] == ['tech']
+    assert shards['rh'].calls == 0
+
+
+def test_registry_permissions_select_shards(shards, registry):
+    shards['s0'] = FakeShard([hit('plan_social.txt', 0.1)])
+    shards['s1'] = FakeShard([hit('guide.txt', 0.2)])
+    retriever = make_retriever(
+        {'s0': (['Employé'], ['plan_social.txt']), 's1': ([], ['guide.txt'])},
+        registry=registry
+    )
+
+    # Le registre fait foi, pas les profils inscrits dans le manifeste
+    assert retriever.shards_for_profile('Employé') == ['s1']
+    search(retriever, 'Employé')
+    assert shards['s0'].calls == 0
+
+    registry.set_profiles('guide.txt', ['Direction'])
+    assert search(retriever, 'Employé') == []
+
+
+def test_slow_shard_does_not_block_the_others(shards):
+    shards['slow'] = FakeShard([hit('slow', 0.0)], delay=5.0)
+    shards['fast'] = FakeShard([hit('fast', 0.4)])
+    retriever = make_retriever({'slow': (['RH'], []), 'fast': (['RH'], [])}, timeout=0.2)
+
+    start = time.perf_counter()
+    results = search(retriever, 'RH')
+    assert [doc.metadata['doc_id'] for doc, _ in results] == ['fast']
+    assert time.perf_counter() - start < 1.0
+
+    # Le shard encore occupé est ignoré sans attendre son délai
+    start = time.perf_counter()
+    results = search(retriever, 'RH')
+    assert [doc.metadata['doc_id'] for doc, _ in results] == ['fast']
+    assert time.perf_counter() - start < 0.1
+    assert shards['slow'].calls == 1
+
+
+def test_unreachable_shard_is_skipped(shards):
+    shards['s1'] = FakeShard([hit('b', 0.2)])
+    retriever = make_retriever({'down': (['RH'], []), 's1': (['RH'], [])})
+
+    results = search(retriever, 'RH')
+
+    assert [doc.metadata['doc_id'] for doc, _ in results] == ['b']
+    assert 'down' not in retriever.shards
+
+
+def test_all_shards_failed_raises(shards):
+    shards['s0'] = FakeShard([], error=RuntimeError("erreur serveur"))
+    shards['s1'] = FakeShard([hit('b', 0.2)], delay=5.0)
+    retriever = make_retriever({'s0': (['RH'], []), 's1': (['RH'], []), 'down': (['RH'], [])}, timeout=0.2)
+
+    with pytest.raises(ShardUnavailableError):
+        search(retriever, 'RH')
+
+
+def test_no_accessible_shard_returns_nothing(shards):
+    shards['s0'] = FakeShard([hit('a', 0.1)])
+    retriever = make_retriever({'s0': (['RH'], [])})
+
+    assert search(retriever, 'Technique') == []
+    assert shards['s0'].calls == 0